@@ -0,0 +1,105 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX, make_password
+from django.db.models import Value
+from django.db.models.functions import Concat
+from django.utils.crypto import constant_time_compare
+
+from .jobs import enqueue, extend_lease
+
+User = get_user_model()
+
+PROVISION_BATCH_SIZE = 500
+
+
+def defer_password_hashing():
+    return getattr(settings, "EMPLOYEE_DEFER_PASSWORD_HASHING", False)
+
+
+def create_employee_user(phone):
+    """
+    Create the login linked to a new employee.
+
+    The initial password is the phone number. With deferred hashing the user
+    starts with an unusable password instead, and the phone number is hashed
+    by a background job (or on first login, whichever comes first), keeping
+    PBKDF2 off the request path.
+    """
+    if defer_password_hashing():
+        user = User.objects.create_user(username=phone, password=None, is_active=True)
+        enqueue("set_employee_password", {"user_id": user.pk})
+        return user
+    return User.objects.create_user(username=phone, password=phone, is_active=True)
+
+
+def release_employee_user(employee):
+    """
+    Free the username (the phone number) of a soft-deleted employee so a new
+    employee can be created with it, and stop the old login from working.
+    """
+    if employee.user_id is None:
+        return
+    suffix = f".deleted-{employee.pk}"
+    User.objects.filter(pk=employee.user_id).exclude(username__endswith=suffix).update(
+        username=Concat("username", Value(suffix)), is_active=False
+    )
+
+
+def pending_password_users():
+    return User.objects.filter(
+        employee__isnull=False,
+        password__startswith=UNUSABLE_PASSWORD_PREFIX,
+    ).order_by("pk")
+
+
+def _init_hash_worker():
+    # Spawned workers start without Django configured
+    django.setup()
+
+
+def provision_employee_passwords(workers=None, batch_size=PROVISION_BATCH_SIZE):
+    """
+    Hash the initial password of every employee user still waiting for one,
+    spreading PBKDF2 across a process pool. Returns the number of users set.
+    """
+    provisioned = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_hash_worker) as pool:
+        while True:
+            users = list(pending_password_users()[:batch_size])
+            if not users:
+                break
+            hashes = pool.map(make_password, [user.username for user in users], chunksize=16)
+            for user, password in zip(users, hashes):
+                user.password = password
+            User.objects.bulk_update(users, ["password"])
+            provisioned += len(users)
+            extend_lease()
+    return provisioned
+
+
+class EmployeeFirstLoginBackend(ModelBackend):
+    """
+    Authenticates an employee whose initial password was deferred, setting
+    the password on the way so later logins go through ModelBackend.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None or password is None:
+            return None
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            return None
+
+        if user.has_usable_password() or not constant_time_compare(password, username):
+            return None
+        if not hasattr(user, "employee") or not self.user_can_authenticate(user):
+            return None
+
+        user.set_password(password)
+        user.save(update_fields=["password"])
+        return user
@@ -0,0 +1,272 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.forms.models import model_to_dict
+from django.utils.timezone import now
+
+from .cache import bump_table_version
+from .history import record_bulk_update
+from .models import Bank, ContractType, Department, Designation, Employee, FieldType, JobTitle, Locations, PhoneCountryCode
+from .serializers import (
+    BankSerializer, ContractTypeSerializer, DepartmentSerializer, FieldTypeSerializer,
+    JobTitleSerializer, LocationsSerializer, PhoneCountryCodeSerializer,
+)
+from .stats import invalidate_employee_stats
+from .validators import (
+    EMPLOYEE_FK_MODELS, validate_bank_payload, validate_contract_type_payload, validate_country_code_payload,
+    validate_department_payload, validate_field_type_payload, validate_job_title_payload,
+    validate_location_payload,
+)
+
+MAX_BULK_ITEMS = 5000
+MAX_BULK_EMPLOYEES = 10000
+BULK_BATCH_SIZE = 500
+
+# name -> (model, validator, editable fields, fields unique among live rows, serializer)
+BULK_LOOKUPS = {
+    "contract_types": (ContractType, validate_contract_type_payload, ["contract_type_name"], ["contract_type_name"], ContractTypeSerializer),
+    "job_titles": (JobTitle, validate_job_title_payload, ["job_title_name"], ["job_title_name"], JobTitleSerializer),
+    "departments": (Department, validate_department_payload, ["department_name"], ["department_name"], DepartmentSerializer),
+    "locations": (Locations, validate_location_payload, ["Location_name"], ["Location_name"], LocationsSerializer),
+    "banks": (Bank, validate_bank_payload, ["bank_name", "swift_code"], ["bank_name", "swift_code"], BankSerializer),
+    "field_types": (FieldType, validate_field_type_payload, ["field_type_name"], ["field_type_name"], FieldTypeSerializer),
+    "country_codes": (PhoneCountryCode, validate_country_code_payload, ["country", "code"], ["code"], PhoneCountryCodeSerializer),
+}
+
+# Lookups whose names appear in the cached headcount stats
+STATS_MODELS = {Department, Locations, ContractType}
+
+
+class BulkError(Exception):
+    def __init__(self, errors):
+        super().__init__("Bulk request rejected.")
+        self.errors = errors
+
+
+def _label(field):
+    return field.replace("_", " ").capitalize()
+
+
+def _unique_errors(model, unique_fields, rows, exclude_pks=()):
+    """
+    Uniqueness of `rows` (index -> final field values) against the other live
+    rows, with one IN query per unique field, and against each other.
+    """
+    errors = {}
+    for field in unique_fields:
+        values = {row[field] for row in rows.values() if row.get(field)}
+        if not values:
+            continue
+        taken = set(
+            model.objects.filter(**{f"{field}__in": values})
+            .exclude(pk__in=exclude_pks)
+            .values_list(field, flat=True)
+        )
+        seen = set()
+        for index, row in rows.items():
+            value = row.get(field)
+            if not value:
+                continue
+            if value in taken:
+                errors.setdefault(index, {})[field] = f"{_label(field)} already exists."
+            elif value in seen:
+                errors.setdefault(index, {})[field] = f"{_label(field)} is duplicated in the request."
+            seen.add(value)
+    return errors
+
+
+def _items(payload, key):
+    items = payload.get(key) if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items:
+        raise BulkError({key: f"{key} must be a non-empty list."})
+    if len(items) > MAX_BULK_ITEMS:
+        raise BulkError({key: f"At most {MAX_BULK_ITEMS} {key} per request."})
+    return items
+
+
+def _changed(model):
+    bump_table_version(model)
+    if model in STATS_MODELS:
+        invalidate_employee_stats()
+
+
+def bulk_create_lookups(name, payload):
+    """Validate every item, then insert them all with bulk_create, or none of them"""
+    model, validator, fields, unique_fields, serializer_class = BULK_LOOKUPS[name]
+    items = _items(payload, "items")
+
+    errors, cleaned = {}, {}
+    for index, item in enumerate(items):
+        result = validator(item if isinstance(item, dict) else {}, check_unique=False)
+        if result["is_valid"]:
+            cleaned[index] = result["cleaned_data"]
+        else:
+            errors[index] = result["errors"]
+    for index, field_errors in _unique_errors(model, unique_fields, cleaned).items():
+        errors.setdefault(index, {}).update(field_errors)
+    if errors:
+        raise BulkError(dict(sorted(errors.items())))
+
+    try:
+        with transaction.atomic():
+            objects = model.objects.bulk_create(
+                [model(**cleaned[index]) for index in range(len(items))], batch_size=BULK_BATCH_SIZE
+            )
+    except IntegrityError as e:
+        raise BulkError({"items": str(e)})
+    _changed(model)
+    return serializer_class(objects, many=True).data
+
+
+def bulk_update_lookups(name, payload):
+    """
+    Apply partial updates given as {"id": ..., <field>: ..., "version": ...}
+    with one bulk_update. An item carrying `version` is rejected if the row
+    has moved on since.
+    """
+    model, validator, fields, unique_fields, serializer_class = BULK_LOOKUPS[name]
+    items = _items(payload, "items")
+    pk_name = model._meta.pk.name
+
+    errors, ids = {}, {}
+    for index, item in enumerate(items):
+        pk = item.get("id", item.get(pk_name)) if isinstance(item, dict) else None
+        try:
+            ids[index] = int(pk)
+        except (TypeError, ValueError):
+            errors[index] = {"id": "id is required."}
+    if len(set(ids.values())) != len(ids):
+        raise BulkError({"items": "Each id may appear only once."})
+
+    with transaction.atomic():
+        current = model.objects.select_for_update().in_bulk(list(ids.values()))
+
+        cleaned = {}
+        for index, pk in ids.items():
+            obj, item = current.get(pk), items[index]
+            if obj is None:
+                errors[index] = {"id": f"{model._meta.verbose_name.capitalize()} with id {pk} does not exist."}
+                continue
+            if "version" in item and item["version"] != obj.version:
+                errors[index] = {"version": f"Modified by someone else; current version is {obj.version}."}
+                continue
+            merged = {**model_to_dict(obj, fields=fields), **{field: item[field] for field in fields if field in item}}
+            result = validator(merged, check_unique=False)
+            if result["is_valid"]:
+                cleaned[index] = {**merged, **result["cleaned_data"]}
+            else:
+                errors[index] = result["errors"]
+        unique = _unique_errors(model, unique_fields, cleaned, exclude_pks=list(ids.values()))
+        for index, field_errors in unique.items():
+            errors.setdefault(index, {}).update(field_errors)
+        if errors:
+            raise BulkError(dict(sorted(errors.items())))
+
+        timestamp = now()
+        objects = []
+        for index, values in cleaned.items():
+            obj = current[ids[index]]
+            for field in fields:
+                setattr(obj, field, values.get(field))
+            obj.updated_at = timestamp
+            obj.version = F("version") + 1
+            objects.append(obj)
+        try:
+            model.objects.bulk_update(objects, fields + ["updated_at", "version"], batch_size=BULK_BATCH_SIZE)
+        except IntegrityError as e:
+            raise BulkError({"items": str(e)})
+
+    _changed(model)
+    return serializer_class(model.objects.filter(pk__in=list(ids.values())), many=True).data
+
+
+def bulk_delete_lookups(name, payload):
+    """Soft-delete with a single UPDATE ... SET deleted = 1 WHERE pk IN (...)"""
+    model = BULK_LOOKUPS[name][0]
+    ids = _items(payload, "ids")
+    try:
+        ids = [int(pk) for pk in ids]
+    except (TypeError, ValueError):
+        raise BulkError({"ids": "ids must be a list of integers."})
+
+    with transaction.atomic():
+        live = set(model.objects.filter(pk__in=ids).values_list("pk", flat=True))
+        deleted = model.objects.filter(pk__in=live).soft_delete()
+    if deleted:
+        _changed(model)
+    return {"deleted": deleted, "not_found": sorted(set(ids) - live)}
+
+
+# Employee columns bulk_update_employees/ may set
+EMPLOYEE_REASSIGN_FIELDS = {
+    **{field: EMPLOYEE_FK_MODELS[field] for field in ["department", "location", "bank", "contract_type", "job_title"]},
+    "designation": (Designation, "Designation"),
+}
+
+
+def clean_employee_patch(patch):
+    """Map {field: id or null} onto {field_id: id or None}, checking every target is live"""
+    if not isinstance(patch, dict) or not patch:
+        raise BulkError({"set": "set must be a non-empty object."})
+
+    errors, cleaned = {}, {}
+    for field, value in patch.items():
+        if field not in EMPLOYEE_REASSIGN_FIELDS:
+            errors[field] = f"{field} cannot be bulk updated."
+            continue
+        model, label = EMPLOYEE_REASSIGN_FIELDS[field]
+        if value is None:
+            cleaned[f"{field}_id"] = None
+            continue
+        try:
+            pk = int(value)
+        except (TypeError, ValueError):
+            errors[field] = f"{field} must be an id or null."
+            continue
+        if not model.objects.filter(pk=pk).exists():
+            errors[field] = f"{label} with id {pk} does not exist."
+        else:
+            cleaned[f"{field}_id"] = pk
+    if errors:
+        raise BulkError(errors)
+    return cleaned
+
+
+def reassign_employees(queryset, patch):
+    """
+    Set the FK columns in `patch` on every employee in `queryset` with one
+    UPDATE that also bumps updated_at and version. Rows already holding the
+    new values are left alone. Returns the number of employees changed.
+
+    The UPDATE sends no post_save, so history and the stats cache are
+    maintained here.
+    """
+    values = clean_employee_patch(patch)
+    columns = list(values)
+
+    with transaction.atomic():
+        rows = list(
+            queryset.select_for_update().order_by()
+            .values_list("employee_id", "version", *columns)[:MAX_BULK_EMPLOYEES + 1]
+        )
+        if len(rows) > MAX_BULK_EMPLOYEES:
+            raise BulkError({"ids": f"At most {MAX_BULK_EMPLOYEES} employees can be updated at once."})
+
+        history = []
+        for employee_id, version, *current in rows:
+            changes = {
+                column[:-3]: [old, values[column]]
+                for column, old in zip(columns, current)
+                if old != values[column]
+            }
+            if changes:
+                history.append((employee_id, version + 1, changes))
+        if not history:
+            return 0
+
+        updated = Employee.objects.filter(pk__in=[employee_id for employee_id, _, _ in history]).update(
+            **values, updated_at=now(), version=F("version") + 1
+        )
+        record_bulk_update(history)
+
+    invalidate_employee_stats()
+    return updated
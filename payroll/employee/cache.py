@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+LOOKUP_CACHE_TIMEOUT = 24 * 60 * 60
+# A process-local backend cannot carry a version bump to the other worker
+# processes, so there entries only live as long as a stale read is tolerable
+LOCAL_BACKEND_TIMEOUT = 60
+LOOKUP_LOCAL_SIZE = 256
+# How long a process trusts its copy of a table version before re-reading
+# the shared one; writes made by the same process are seen immediately
+LOOKUP_VERSION_TTL = 1.0
+FILL_LOCK_TIMEOUT = 30
+FILL_WAIT = 5.0
+
+
+class LocalLRU:
+    """Small thread-safe per-process LRU"""
+
+    def __init__(self, maxsize=LOOKUP_LOCAL_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            value, expires = self._data[key]
+            if expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=LOOKUP_CACHE_TIMEOUT):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local = LocalLRU()
+_local_versions = {}
+_fill_locks = {}
+
+
+def cache_is_shared():
+    """False when the default cache lives inside each process (LocMemCache)"""
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache)
+
+
+def _version_key(model):
+    return f"lookup_version:{model._meta.db_table}"
+
+
+def table_version(model):
+    """
+    Version of `model`'s table in the shared cache. A missing version starts
+    from the clock rather than 1, so an evicted counter never reuses a number
+    that older entries were cached under.
+    """
+    key = _version_key(model)
+    local = _local_versions.get(key)
+    if local is not None and local[1] > time.monotonic():
+        return local[0]
+
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns())
+        version = cache.get(key)
+    _local_versions[key] = (version, time.monotonic() + LOOKUP_VERSION_TTL)
+    return version
+
+
+def bump_table_version(model):
+    """Invalidate everything cached from `model`'s table, once the current transaction commits"""
+    def bump():
+        key = _version_key(model)
+        try:
+            version = cache.incr(key)
+        except ValueError:
+            version = time.time_ns()
+            cache.set(key, version)
+        _local_versions[key] = (version, time.monotonic() + LOOKUP_VERSION_TTL)
+
+    transaction.on_commit(bump)
+
+
+def _fill(name, key, build, timeout):
+    """Build a missing entry once: one thread per process, one process per cache"""
+    with _fill_locks.setdefault(name, threading.Lock()):
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+        lock_key = f"{key}:lock"
+        if cache.add(lock_key, 1, FILL_LOCK_TIMEOUT):
+            try:
+                value = build()
+                cache.set(key, value, timeout)
+            finally:
+                cache.delete(lock_key)
+            return value
+
+        # Another process is building it; wait for its result
+        deadline = time.monotonic() + FILL_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            value = cache.get(key)
+            if value is not None:
+                return value
+        return build()
+
+
+def cached_lookup(name, models, build, timeout=LOOKUP_CACHE_TIMEOUT):
+    """
+    Return build() from a two-level cache: this process's LRU, then the
+    shared Django cache. Entries are keyed by the current version of every
+    table in `models`, so bumping any of them makes the old entry unreachable.
+
+    Callers must treat the returned value as read-only; it is shared.
+    """
+    if not cache_is_shared():
+        timeout = min(timeout, LOCAL_BACKEND_TIMEOUT)
+    versions = ".".join(str(table_version(model)) for model in models)
+    key = f"lookup:{name}:{versions}"
+
+    value = _local.get(key)
+    if value is not None:
+        return value
+    value = cache.get(key)
+    if value is None:
+        value = _fill(name, key, build, timeout)
+    _local.set(key, value, timeout)
+    return value
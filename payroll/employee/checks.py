@@ -0,0 +1,17 @@
+from django.core.checks import Warning, register
+
+from .cache import LOCAL_BACKEND_TIMEOUT, cache_is_shared
+
+
+@register(deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if cache_is_shared():
+        return []
+    return [
+        Warning(
+            "The default cache is process-local, so a lookup change made in one worker "
+            f"process reaches the others only when their copy expires (up to {LOCAL_BACKEND_TIMEOUT}s).",
+            hint="Point CACHES['default'] at a shared backend such as Redis or Memcached.",
+            id="employee.W001",
+        )
+    ]
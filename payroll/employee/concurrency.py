@@ -0,0 +1,75 @@
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.utils.http import quote_etag
+from rest_framework.response import Response
+
+
+class VersionConflict(Exception):
+    def __init__(self, instance, current_version):
+        super().__init__(f"{instance._meta.object_name} {instance.pk} was modified by someone else.")
+        self.current_version = current_version
+
+
+def if_match_version(request):
+    """
+    The version a client based its edit on, from an If-Match header holding
+    the ETag of an update ("<version>") or of a detail GET ("<version>.<hash>").
+    None when the header is absent or "*"; an unparseable value never matches.
+    """
+    header = request.headers.get("If-Match", "").strip()
+    if not header or header == "*":
+        return None
+    try:
+        return int(header.removeprefix("W/").strip('"').split(".")[0])
+    except ValueError:
+        return -1
+
+
+def save_versioned(instance, expected_version=None, update_fields=None):
+    """
+    Save `instance` with one conditional UPDATE ... SET version = version + 1
+    WHERE pk = %s AND version = %s, raising VersionConflict if another writer
+    got there first. No row lock is taken.
+
+    `expected_version` defaults to the version the instance was loaded with.
+    post_save is sent as for Model.save().
+    """
+    expected = instance.version if expected_version is None else expected_version
+    model = type(instance)
+    fields = [
+        field for field in instance._meta.concrete_fields
+        if not field.primary_key and field.name != "version"
+        and (update_fields is None or field.name in update_fields or getattr(field, "auto_now", False))
+    ]
+    values = {field.attname: field.pre_save(instance, False) for field in fields}
+
+    updated = 0
+    if expected == instance.version:
+        updated = model._base_manager.filter(pk=instance.pk, version=expected).update(
+            version=F("version") + 1, **values
+        )
+    if not updated:
+        current = model._base_manager.filter(pk=instance.pk).values_list("version", flat=True).first()
+        raise VersionConflict(instance, current)
+
+    instance.version = expected + 1
+    post_save.send(
+        sender=model, instance=instance, created=False,
+        update_fields=frozenset(update_fields) if update_fields is not None else None,
+        raw=False, using=instance._state.db,
+    )
+
+
+def versioned(response, instance):
+    """Expose the saved version in the body and as the ETag for the next If-Match"""
+    response.data["version"] = instance.version
+    response["ETag"] = quote_etag(str(instance.version))
+    return response
+
+
+def conflict_response(error):
+    return Response({
+        "error": str(error),
+        "current_version": error.current_version,
+        "status": 409
+    }, status=409)
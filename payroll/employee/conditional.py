@@ -0,0 +1,63 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def collection_stamp(queryset, related=(), versioned=False):
+    """
+    Summarise `queryset` as its row count and latest `updated_at`.
+
+    The latest `updated_at` of each lookup in `related` is folded in as well,
+    so renaming a department changes the stamp of the employees that display
+    its name. For a single versioned row pass versioned=True to include its
+    `version`, which then leads the ETag so it can be sent back as If-Match.
+
+    A collection also carries the latest `updated_at` of the whole table,
+    soft-deleted rows included: a row that leaves the set (deleted, or edited
+    out of a filter) is stamped on the way out but no longer counts above.
+    """
+    aggregates = {"count": Count("pk"), "updated_at": Max("updated_at")}
+    if versioned:
+        aggregates["version"] = Max("version")
+    for name in related:
+        aggregates[f"{name}__updated_at"] = Max(f"{name}__updated_at")
+    stamp = queryset.order_by().aggregate(**aggregates)
+    if not versioned:
+        stamp["table__updated_at"] = queryset.model._base_manager.aggregate(latest=Max("updated_at"))["latest"]
+    return stamp
+
+
+class CacheValidators:
+    """ETag / Last-Modified pair for a response built from a collection stamp"""
+
+    def __init__(self, request, stamp):
+        timestamps = [
+            value for key, value in stamp.items()
+            if key.endswith("updated_at") and value is not None
+        ]
+        self.last_modified = int(max(timestamps).timestamp()) if timestamps else None
+
+        # The path carries cursor, limit and fields, which all change the body
+        source = "|".join([
+            request.get_full_path(),
+            getattr(request, "accepted_media_type", ""),
+            repr(sorted(stamp.items())),
+        ])
+        digest = hashlib.sha1(source.encode()).hexdigest()
+        if stamp.get("version") is not None:
+            digest = f"{stamp['version']}.{digest}"
+        self.etag = quote_etag(digest)
+
+        self.not_modified = get_conditional_response(
+            request, etag=self.etag, last_modified=self.last_modified
+        )
+        if self.not_modified is not None:
+            self.apply(self.not_modified)
+
+    def apply(self, response):
+        response["ETag"] = self.etag
+        if self.last_modified is not None:
+            response["Last-Modified"] = http_date(self.last_modified)
+        return response
@@ -0,0 +1,110 @@
+import hashlib
+import re
+
+from django.db import connections, models
+from django.db.models import F, Func, TextField
+
+from .models import Employee, EmployeeCustomFieldConfig
+
+INDEX_PREFIX = "employee_cf_"
+FILTER_PREFIX = "cf."
+INDEXABLE_KEY_RE = re.compile(r"^[A-Za-z0-9_]+$")
+
+
+class CustomFieldValue(Func):
+    """
+    Text value of one `custom_fields` key.
+
+    The key is inlined into the SQL rather than passed as a parameter, so the
+    expression a filter compiles to is identical to the one the index was
+    built on and the planner can use the index. Only keys matching
+    INDEXABLE_KEY_RE are accepted.
+    """
+    output_field = TextField()
+
+    def __init__(self, field_key):
+        if not INDEXABLE_KEY_RE.match(field_key):
+            raise ValueError(f"Custom field key '{field_key}' cannot be indexed.")
+        self.field_key = field_key
+        super().__init__(F("custom_fields"))
+
+    def as_sql(self, compiler, connection, **extra_context):
+        column, params = compiler.compile(self.source_expressions[0])
+        return f"CAST(JSON_EXTRACT({column}, '$.\"{self.field_key}\"') AS TEXT)", params
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        column, params = compiler.compile(self.source_expressions[0])
+        return f"({column} ->> '{self.field_key}')", params
+
+
+def custom_field_index(field_key):
+    """Expression index on one custom_fields key over live employees"""
+    digest = hashlib.md5(field_key.encode()).hexdigest()[:10]
+    return models.Index(
+        CustomFieldValue(field_key),
+        name=f"{INDEX_PREFIX}{digest}",
+        condition=models.Q(deleted=False),
+    )
+
+
+def sync_custom_field_indexes(using="default"):
+    """
+    Create the index of every live, indexed custom field config and drop the
+    indexes whose config went away or stopped being indexed.
+
+    Runs DDL, so call it outside of a transaction (SQLite refuses schema
+    changes inside one).
+    """
+    connection = connections[using]
+    wanted = {}
+    for field_key in (
+        EmployeeCustomFieldConfig.objects.using(using)
+        .filter(is_indexed=True)
+        .values_list("field_key", flat=True)
+    ):
+        index = custom_field_index(field_key)
+        wanted[index.name] = index
+
+    with connection.cursor() as cursor:
+        existing = {
+            name for name in connection.introspection.get_constraints(cursor, Employee._meta.db_table)
+            if name.startswith(INDEX_PREFIX)
+        }
+
+    if existing == set(wanted):
+        return
+
+    with connection.schema_editor() as editor:
+        for name in existing - set(wanted):
+            editor.remove_index(Employee, models.Index(F("custom_fields"), name=name))
+        for name in set(wanted) - existing:
+            editor.add_index(Employee, wanted[name])
+
+
+def custom_field_filters(queryset, params):
+    """
+    Apply `cf.<field_key>=value` query parameters to an Employee queryset.
+
+    Only indexed custom fields can be filtered on; returns the filtered
+    queryset and a dict of errors for the parameters that were rejected.
+    """
+    requested = {
+        key[len(FILTER_PREFIX):]: value
+        for key, value in params.items() if key.startswith(FILTER_PREFIX)
+    }
+    if not requested:
+        return queryset, {}
+
+    indexed = set(
+        EmployeeCustomFieldConfig.objects
+        .filter(field_key__in=requested, is_indexed=True)
+        .values_list("field_key", flat=True)
+    )
+    errors = {}
+    for position, (field_key, value) in enumerate(requested.items()):
+        if field_key not in indexed:
+            errors[f"{FILTER_PREFIX}{field_key}"] = f"Custom field '{field_key}' is not an indexed custom field."
+            continue
+        alias = f"custom_field_{position}"
+        queryset = queryset.alias(**{alias: CustomFieldValue(field_key)}).filter(**{alias: value})
+    return queryset, errors
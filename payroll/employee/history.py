@@ -0,0 +1,192 @@
+import atexit
+import copy
+import logging
+import queue
+import threading
+import time
+from contextvars import ContextVar
+
+from django.db import OperationalError, close_old_connections, transaction
+from django.utils.timezone import now
+
+from .models import EmployeeHistory
+
+logger = logging.getLogger(__name__)
+
+HISTORY_BATCH_SIZE = 200
+HISTORY_FLUSH_INTERVAL = 1.0
+# A batch that hits a database error such as SQLite's "database is locked"
+# is put back and retried, waiting HISTORY_RETRY_DELAY between attempts
+HISTORY_MAX_ATTEMPTS = 20
+HISTORY_RETRY_DELAY = 1.0
+UNTRACKED_FIELDS = {"employee_id", "created_at", "updated_at", "version"}
+
+_current_user_id = ContextVar("history_user_id", default=None)
+
+
+class CurrentUserMiddleware:
+    """Remembers who is making the request so history entries can name them"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        user = getattr(request, "user", None)
+        token = _current_user_id.set(user.pk if user is not None and user.is_authenticated else None)
+        try:
+            return self.get_response(request)
+        finally:
+            _current_user_id.reset(token)
+
+
+class HistoryWriter:
+    """
+    Buffers history entries in memory and writes them with bulk_create from a
+    background thread, every HISTORY_FLUSH_INTERVAL seconds or once
+    HISTORY_BATCH_SIZE entries are waiting, so saving an employee never waits
+    on an extra insert.
+    """
+
+    def __init__(self, batch_size=HISTORY_BATCH_SIZE, interval=HISTORY_FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def add(self, entry):
+        self._ensure_started()
+        self._queue.put(entry)
+
+    def _ensure_started(self):
+        # Started lazily, so forked worker processes get their own thread
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="employee-history-writer", daemon=True)
+                self._thread.start()
+
+    def _take(self, block):
+        entries = []
+        try:
+            entries.append(self._queue.get(block=block, timeout=self.interval if block else None))
+            while len(entries) < self.batch_size:
+                entries.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return entries
+
+    def _write(self, entries):
+        """Write a batch; returns False when it was put back to be retried"""
+        try:
+            EmployeeHistory.objects.bulk_create(entries)
+        except OperationalError:
+            retry = []
+            for entry in entries:
+                entry._write_attempts = getattr(entry, "_write_attempts", 0) + 1
+                if entry._write_attempts < HISTORY_MAX_ATTEMPTS:
+                    retry.append(entry)
+            if len(retry) < len(entries):
+                logger.exception("Gave up writing %d employee history entries", len(entries) - len(retry))
+            else:
+                logger.warning("Could not write %d employee history entries, retrying", len(retry), exc_info=True)
+            for entry in retry:
+                self._queue.put(entry)
+            return False
+        except Exception:
+            logger.exception("Could not write %d employee history entries", len(entries))
+        return True
+
+    def _run(self):
+        while True:
+            entries = self._take(block=True)
+            if entries and not self._write(entries):
+                time.sleep(HISTORY_RETRY_DELAY)
+            close_old_connections()
+
+    def flush(self):
+        """Write everything buffered so far from the calling thread"""
+        while True:
+            entries = self._take(block=False)
+            if not entries:
+                return
+            if not self._write(entries):
+                time.sleep(HISTORY_RETRY_DELAY)
+
+
+writer = HistoryWriter()
+atexit.register(writer.flush)
+
+
+def _tracked_fields(employee):
+    return [field for field in employee._meta.concrete_fields if field.attname not in UNTRACKED_FIELDS]
+
+
+def tracked_values(employee):
+    """Current values keyed by column attname, FKs as ids"""
+    return {field.attname: field.value_from_object(employee) for field in _tracked_fields(employee)}
+
+
+def record(employee, action, changes):
+    entry = EmployeeHistory(
+        employee_id=employee.pk,
+        action=action,
+        changes=changes,
+        version=getattr(employee, "version", None),
+        changed_by_id=_current_user_id.get(),
+        changed_at=now(),
+    )
+    # Only changes that were committed make it into the history
+    transaction.on_commit(lambda: writer.add(entry))
+
+
+def record_bulk_update(rows):
+    """
+    History for a set-based UPDATE that bypassed post_save. `rows` holds
+    (employee_id, new_version, changes) triples.
+    """
+    user_id, changed_at = _current_user_id.get(), now()
+    entries = [
+        EmployeeHistory(
+            employee_id=employee_id,
+            action=EmployeeHistory.UPDATED,
+            changes=changes,
+            version=version,
+            changed_by_id=user_id,
+            changed_at=changed_at,
+        )
+        for employee_id, version, changes in rows
+    ]
+    transaction.on_commit(lambda: [writer.add(entry) for entry in entries])
+
+
+def record_created(employee):
+    values = tracked_values(employee)
+    record(employee, EmployeeHistory.CREATED, {
+        field.name: [None, values[field.attname]]
+        for field in _tracked_fields(employee)
+        if values[field.attname] not in (None, "", {})
+    })
+    employee._loaded_values = copy.deepcopy(values)
+
+
+def record_saved(employee, update_fields=None):
+    """Record the fields that changed since the employee was loaded or last saved"""
+    values = tracked_values(employee)
+    loaded = getattr(employee, "_loaded_values", {})
+    changes = {
+        field.name: [loaded[field.attname], values[field.attname]]
+        for field in _tracked_fields(employee)
+        if field.attname in loaded and loaded[field.attname] != values[field.attname]
+        and (update_fields is None or field.name in update_fields)
+    }
+    if changes:
+        # The app only ever soft-deletes, which reaches here as a save
+        deleting = changes.get("deleted") == [False, True]
+        record(employee, EmployeeHistory.DELETED if deleting else EmployeeHistory.UPDATED, changes)
+    employee._loaded_values = {**loaded, **copy.deepcopy(values)}
+
+
+def record_deleted(employee):
+    record(employee, EmployeeHistory.DELETED, {})
@@ -0,0 +1,187 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+from .history import record_created
+from .jobs import enqueue
+from .models import Employee
+from .stats import invalidate_employee_stats
+from .validators import LookupResolver, validate_employee_payloads
+
+User = get_user_model()
+
+IMPORT_BATCH_SIZE = 500
+UNIQUE_FIELDS = ["phone_number", "iban", "emirates_id"]
+
+
+class ImportFileError(ValueError):
+    pass
+
+
+def _cell(value):
+    """Normalise a spreadsheet cell to the string form the validators expect"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    value = str(value).strip()
+    return value or None
+
+
+def _row(headers, values):
+    row = {header: _cell(value) for header, value in zip(headers, values) if header}
+    custom_fields = row.get("custom_fields")
+    if custom_fields:
+        try:
+            row["custom_fields"] = json.loads(custom_fields)
+        except ValueError:
+            pass  # reported by the validator as not being a JSON object
+    return row
+
+
+def iter_csv_rows(uploaded_file):
+    try:
+        reader = csv.reader(io.TextIOWrapper(uploaded_file, encoding="utf-8-sig", newline=""))
+        headers = [header.strip() for header in next(reader, [])]
+        for values in reader:
+            yield _row(headers, values)
+    except UnicodeDecodeError:
+        raise ImportFileError("CSV files must be UTF-8 encoded; save the sheet as \"CSV UTF-8\".")
+    except csv.Error as e:
+        raise ImportFileError(f"Could not read the CSV file: {e}")
+
+
+def iter_xlsx_rows(uploaded_file):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("XLSX import requires the openpyxl package.")
+
+    # read_only mode streams rows instead of loading the whole sheet
+    workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = [_cell(header) for header in next(rows, [])]
+        for values in rows:
+            yield _row(headers, values)
+    finally:
+        workbook.close()
+
+
+def iter_import_rows(uploaded_file):
+    name = (uploaded_file.name or "").lower()
+    if name.endswith(".csv"):
+        return iter_csv_rows(uploaded_file)
+    if name.endswith(".xlsx"):
+        return iter_xlsx_rows(uploaded_file)
+    raise ImportFileError("Only .csv and .xlsx files can be imported.")
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class EmployeeImporter:
+    """
+    Validate and insert employee rows in batches.
+
+    Each batch is validated with the same rules as create_employee/, checked
+    for clashes with existing rows in one query, and inserted with two
+    bulk_create calls (users, then employees). The linked users always get
+    an unusable password; see employee.accounts for how it is provisioned.
+    """
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.resolver = LookupResolver()
+        self.seen = {field: set() for field in UNIQUE_FIELDS}
+        self.created = 0
+        self.errors = []
+
+    def run(self, rows):
+        # Row 1 is the header
+        numbered = ((number, row) for number, row in enumerate(rows, start=2))
+        for batch in _batches(numbered, self.batch_size):
+            self.import_batch(batch)
+        if self.created:
+            invalidate_employee_stats()
+            enqueue("provision_employee_passwords")
+        return {"created": self.created, "failed": len(self.errors), "errors": self.errors}
+
+    def _existing_values(self, rows):
+        values = {field: {row.get(field) for _, row in rows if row.get(field)} for field in UNIQUE_FIELDS}
+        condition = Q()
+        for field in UNIQUE_FIELDS:
+            if values[field]:
+                condition |= Q(**{f"{field}__in": values[field]})
+        existing = {field: set() for field in UNIQUE_FIELDS}
+        if condition:
+            for row in Employee.objects.filter(condition).values(*UNIQUE_FIELDS):
+                for field in UNIQUE_FIELDS:
+                    existing[field].add(row[field])
+        existing["username"] = set(
+            User.objects.filter(username__in=values["phone_number"]).values_list("username", flat=True)
+        )
+        return existing
+
+    def import_batch(self, batch):
+        results = validate_employee_payloads([row for _, row in batch], self.resolver)
+        existing = self._existing_values(batch)
+
+        valid = []
+        for (number, row), result in zip(batch, results):
+            errors = dict(result["errors"])
+            for field in UNIQUE_FIELDS:
+                value = row.get(field)
+                if not value or field in errors:
+                    continue
+                if value in existing[field]:
+                    errors[field] = f"{field.replace('_', ' ').capitalize()} already exists."
+                elif value in self.seen[field]:
+                    errors[field] = f"{field.replace('_', ' ').capitalize()} is duplicated in the file."
+            if row.get("phone_number") in existing["username"] and "phone_number" not in errors:
+                errors["phone_number"] = "A user with this phone number already exists."
+
+            if errors:
+                self.errors.append({"row": number, "errors": errors})
+                continue
+            for field in UNIQUE_FIELDS:
+                if row.get(field):
+                    self.seen[field].add(row[field])
+            valid.append(result["cleaned_data"])
+
+        if not valid:
+            return
+
+        with transaction.atomic():
+            users = []
+            for cleaned_data in valid:
+                user = User(username=cleaned_data["phone_number"], is_active=True)
+                user.set_unusable_password()
+                users.append(user)
+            users = User.objects.bulk_create(users)
+
+            employees = Employee.objects.bulk_create([
+                Employee(user=user, **{"custom_fields": {}, **cleaned_data})
+                for user, cleaned_data in zip(users, valid)
+            ])
+            # bulk_create sends no post_save
+            for employee in employees:
+                record_created(employee)
+        self.created += len(valid)
@@ -0,0 +1,172 @@
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils.timezone import now
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+JOB_HANDLERS = {}
+
+BACKOFF_BASE = 10
+BACKOFF_MAX = 60 * 60
+# A running job whose worker has not finished it or renewed its lease (see
+# extend_lease) by then is assumed lost
+LEASE_TIMEOUT = timedelta(minutes=15)
+CLAIM_BATCH = 10
+
+_current_job = ContextVar("current_job", default=None)
+
+
+def register_job(name):
+    """Decorator making a function runnable as job `name`; it gets the payload as kwargs"""
+    def decorator(func):
+        JOB_HANDLERS[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, run_at=None, max_attempts=5):
+    """
+    Queue job `name`. Called inside a transaction, the job only becomes
+    visible to workers if that transaction commits.
+    """
+    if name not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job {name!r}.")
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        run_at=run_at or now(),
+        max_attempts=max_attempts,
+    )
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def backoff(attempts):
+    """Exponential backoff with jitter before retry number `attempts`"""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+def _due_jobs(at):
+    return Job.objects.filter(status=Job.QUEUED, run_at__lte=at)
+
+
+def claim_job(worker):
+    """
+    Take the next due job for `worker`, or return None.
+
+    Backends with SKIP LOCKED lock the row so concurrent workers pass over
+    it. Others (SQLite) flip the status with a conditional UPDATE, which only
+    one worker can win for a given row.
+    """
+    claimed_at = now()
+    claim = {"status": Job.RUNNING, "locked_by": worker, "locked_at": claimed_at, "attempts": F("attempts") + 1}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = _due_jobs(claimed_at).order_by("run_at", "id").select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            Job.objects.filter(pk=job.pk).update(**claim)
+    else:
+        candidates = _due_jobs(claimed_at).order_by("run_at", "id").values_list("id", flat=True)[:CLAIM_BATCH]
+        for job_id in candidates:
+            # Re-check due-ness too: another worker may have run and rescheduled it
+            if _due_jobs(claimed_at).filter(pk=job_id).update(**claim):
+                break
+        else:
+            return None
+        job = Job(pk=job_id)
+
+    job.refresh_from_db()
+    return job
+
+
+def _held(job):
+    # The job as long as this worker still holds its lease
+    return Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_by=job.locked_by)
+
+
+def extend_lease():
+    """
+    Renew the lease on the job being run, for handlers that may take longer
+    than LEASE_TIMEOUT; call it between units of work. Returns False once the
+    lease has been lost. Outside a job it does nothing.
+    """
+    job = _current_job.get()
+    if job is None:
+        return True
+    return bool(_held(job).update(locked_at=now()))
+
+
+def run_job(job):
+    """Run a claimed job and record the outcome: done, retry later, or dead"""
+    token = _current_job.set(job)
+    try:
+        handler = JOB_HANDLERS[job.name]
+        handler(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            logger.error("Job %s (%s) failed for good:\n%s", job.pk, job.name, error)
+            _held(job).update(status=Job.DEAD, last_error=error, locked_by=None, updated_at=now())
+        else:
+            logger.warning("Job %s (%s) failed, retrying:\n%s", job.pk, job.name, error)
+            _held(job).update(
+                status=Job.QUEUED, run_at=now() + backoff(job.attempts),
+                last_error=error, locked_by=None, updated_at=now(),
+            )
+        return False
+    finally:
+        _current_job.reset(token)
+
+    _held(job).update(status=Job.SUCCEEDED, locked_by=None, updated_at=now())
+    return True
+
+
+def requeue_stale_jobs():
+    """
+    Give jobs held by a crashed worker back to the queue, or dead-letter them
+    when they have used up their attempts, so a job that keeps killing its
+    worker is not retried forever.
+    """
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=now() - LEASE_TIMEOUT)
+    error = "The lease expired before the worker running the job finished it."
+    stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.DEAD, last_error=error, locked_by=None, updated_at=now()
+    )
+    return stale.update(status=Job.QUEUED, last_error=error, locked_by=None, updated_at=now())
+
+
+def work(worker=None, poll_interval=1.0, burst=False, should_stop=lambda: False):
+    """
+    Claim and run jobs until should_stop() is true, sleeping `poll_interval`
+    seconds whenever the queue is empty. In burst mode return as soon as no
+    job is due instead. Returns the number of jobs run.
+    """
+    worker = worker or worker_id()
+    processed = 0
+    while not should_stop():
+        requeue_stale_jobs()
+        job = claim_job(worker)
+        if job is None:
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
+    return processed
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from employee.accounts import PROVISION_BATCH_SIZE, provision_employee_passwords
+
+
+class Command(BaseCommand):
+    help = "Hash the deferred initial passwords of employee users across a process pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None, help="Hashing processes (default: CPU count)")
+        parser.add_argument("--batch-size", type=int, default=PROVISION_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        count = provision_employee_passwords(workers=options["workers"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Provisioned {count} employee password(s)."))
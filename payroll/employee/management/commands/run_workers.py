@@ -0,0 +1,52 @@
+import multiprocessing
+import signal
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from employee.jobs import work, worker_id
+
+
+def _worker_process(poll_interval, burst, stop):
+    # A no-op after fork; spawned processes start without Django configured
+    django.setup()
+    # Connections inherited from the parent must not be shared across processes
+    connections.close_all()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    work(worker=worker_id(), poll_interval=poll_interval, burst=burst, should_stop=stop.is_set)
+
+
+class Command(BaseCommand):
+    help = "Run worker processes that execute queued background jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to wait when the queue is empty")
+        parser.add_argument("--burst", action="store_true", help="Exit once no job is due")
+
+    def handle(self, *args, **options):
+        stop = multiprocessing.Event()
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(
+                target=_worker_process,
+                args=(options["poll_interval"], options["burst"], stop),
+                name=f"job-worker-{i}",
+            )
+            for i in range(options["workers"])
+        ]
+        for process in processes:
+            process.start()
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        self.stdout.write(f"Started {len(processes)} worker(s).")
+
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping workers after their current job...")
+            stop.set()
+            for process in processes:
+                process.join()
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from employee.search import drop_search_index, install_search_index
+
+
+def create_index(apps, schema_editor):
+    install_search_index(schema_editor.connection)
+
+
+def drop_index(apps, schema_editor):
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0009_designation_timestamps_phonecountrycode_timestamps'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
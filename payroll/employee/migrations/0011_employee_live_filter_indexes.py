@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0010_employee_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='employee',
+            name='Employee_departm_c259d0_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='employee',
+            name='Employee_locatio_94519f_idx',
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['department', 'employee_id'], name='employee_live_department_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['location', 'employee_id'], name='employee_live_location_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['contract_type', 'employee_id'], name='employee_live_contract_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['job_title', 'employee_id'], name='employee_live_job_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['bank', 'employee_id'], name='employee_live_bank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['designation', 'employee_id'], name='employee_live_designation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['visa_expiry'], name='employee_live_visa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['contract_start_date'], name='employee_live_contract_start'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['contract_end_date'], name='employee_live_contract_end'),
+        ),
+    ]
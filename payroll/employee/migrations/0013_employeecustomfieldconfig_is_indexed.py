@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0012_employee_changes_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employeecustomfieldconfig',
+            name='is_indexed',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,122 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0017_employeehistory'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='employee',
+            name='Employee_deleted_55808d_idx',
+        ),
+        migrations.AlterField(
+            model_name='bank',
+            name='swift_code',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+        migrations.AlterField(
+            model_name='contracttype',
+            name='contract_type_name',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name='department',
+            name='department_name',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name='employee',
+            name='emirates_id',
+            field=models.CharField(blank=True, max_length=50, null=True),
+        ),
+        migrations.AlterField(
+            model_name='employee',
+            name='iban',
+            field=models.CharField(max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='employee',
+            name='phone_number',
+            field=models.CharField(max_length=15),
+        ),
+        migrations.AlterField(
+            model_name='employeecustomfieldconfig',
+            name='field_key',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='fieldtype',
+            name='field_type_name',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name='jobtitle',
+            name='job_title_name',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name='locations',
+            name='Location_name',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name='phonecountrycode',
+            name='code',
+            field=models.CharField(blank=True, max_length=10, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='bank',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted', False)), fields=('bank_name',), name='bank_live_name_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='bank',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted', False)), fields=('swift_code',), name='bank_live_swift_code_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='contracttype',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted', False)), fields=('contract_type_name',), name='contract_type_live_name_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='department',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted', False)), fields=('department_name',), name='department_live_name_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='employee',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted', False)), fields=('phone_number',), name='employee_live_phone_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='employee',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted', False)), fields=('emirates_id',), name='employee_live_emirates_id_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='employee',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted', False)), fields=('iban',), name='employee_live_iban_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='employeecustomfieldconfig',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted', False)), fields=('field_key',), name='custom_field_live_key_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='fieldtype',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted', False)), fields=('field_type_name',), name='field_type_live_name_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='jobtitle',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted', False)), fields=('job_title_name',), name='job_title_live_name_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='locations',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted', False)), fields=('Location_name',), name='location_live_name_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='phonecountrycode',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted', False)), fields=('code',), name='phone_country_code_live_code_uniq'),
+        ),
+    ]
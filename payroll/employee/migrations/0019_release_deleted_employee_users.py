@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Value
+from django.db.models.functions import Concat
+
+
+def release_deleted_employee_users(apps, schema_editor):
+    # Same renaming as employee.accounts.release_employee_user, for employees
+    # soft-deleted before it existed
+    Employee = apps.get_model('employee', 'Employee')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    deleted = Employee.objects.filter(deleted=True, user__isnull=False).values_list('pk', 'user_id')
+    for employee_id, user_id in deleted.iterator():
+        suffix = f'.deleted-{employee_id}'
+        User.objects.filter(pk=user_id).exclude(username__endswith=suffix).update(
+            username=Concat('username', Value(suffix)), is_active=False
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0018_soft_delete_managers_live_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(release_deleted_employee_users, migrations.RunPython.noop),
+    ]
@@ -1,42 +1,95 @@
+import copy
+import uuid
 from contextlib import nullcontext
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.timezone import now
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    def live(self):
+        return self.filter(deleted=False)
+
+    def removed(self):
+        return self.filter(deleted=True)
+
+    def soft_delete(self):
+        """Flag the rows as deleted with a single UPDATE; returns the row count"""
+        return self.update(deleted=True, updated_at=now(), version=models.F("version") + 1)
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """
+    Default manager of the soft-deletable models: soft-deleted rows are left
+    out of every query. `all_objects` still sees them; related-object access
+    (employee.department) goes through the base manager and is unaffected.
+    """
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted=False)
+
+
+def live_unique(field, name):
+    """Unique among live rows only, so a soft-deleted value can be reused"""
+    return models.UniqueConstraint(fields=[field], name=name, condition=models.Q(deleted=False))
+
 
 # Create your models here.
 class ContractType(models.Model):
     contract_type_id = models.AutoField(primary_key=True)
-    contract_type_name = models.CharField(max_length=100,null=True,blank=True,unique=True)
+    contract_type_name = models.CharField(max_length=100,null=True,blank=True)
     deleted = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
+
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
      
     class Meta:
         db_table = 'ContractType'
+        constraints = [
+            live_unique('contract_type_name', 'contract_type_live_name_uniq'),
+        ]
 
     def __str__(self):
         return self.contract_type_name
 
 class JobTitle(models.Model):
     job_title_id = models.AutoField(primary_key=True)
-    job_title_name = models.CharField(max_length=100,null=True,blank=True,unique=True)
+    job_title_name = models.CharField(max_length=100,null=True,blank=True)
     deleted = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
+
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
 
     class Meta:
         db_table = 'JobTitle'
+        constraints = [
+            live_unique('job_title_name', 'job_title_live_name_uniq'),
+        ]
 
     def __str__(self):
         return self.job_title_name
 
 class Locations(models.Model):
     Location_id = models.AutoField(primary_key=True)
-    Location_name= models.CharField(max_length=100,null=True,blank=True,unique=True)
+    Location_name= models.CharField(max_length=100,null=True,blank=True)
     deleted = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
+
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
     class Meta:
         db_table = 'Locations'   
+        constraints = [
+            live_unique('Location_name', 'location_live_name_uniq'),
+        ]
     def __str__(self):
         return self.Location_name
 
@@ -53,12 +106,19 @@ class Locations(models.Model):
 
 class Department(models.Model):
     department_id = models.AutoField(primary_key=True)
-    department_name = models.CharField(max_length=100,null=True,blank=True,unique=True)
+    department_name = models.CharField(max_length=100,null=True,blank=True)
     deleted = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
+
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
     class Meta:
         db_table = 'Department'
+        constraints = [
+            live_unique('department_name', 'department_live_name_uniq'),
+        ]
     def __str__(self):
         return self.department_name
 
@@ -68,6 +128,12 @@ class Designation(models.Model):
    
     department = models.ForeignKey(Department, on_delete=models.SET_NULL, related_name='department',null=True,blank=True)
     deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
+
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
     class Meta:
         db_table = 'Designation'
         
@@ -78,51 +144,86 @@ class Designation(models.Model):
 class Bank(models.Model):
     bank_id = models.AutoField(primary_key=True)
     bank_name = models.CharField(max_length=100)
-    swift_code = models.CharField(max_length=20, blank=True, null=True,unique=True)
+    swift_code = models.CharField(max_length=20, blank=True, null=True)
 
     deleted = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
+
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
 
     class Meta:
         db_table = 'Bank'
         ordering = ['bank_name']
+        constraints = [
+            live_unique('bank_name', 'bank_live_name_uniq'),
+            live_unique('swift_code', 'bank_live_swift_code_uniq'),
+        ]
 
     def __str__(self):
         return self.bank_name
 
 class FieldType(models.Model):
     field_type_id = models.AutoField(primary_key=True)
-    field_type_name = models.CharField(max_length=100,null=True,blank=True,unique=True)
+    field_type_name = models.CharField(max_length=100,null=True,blank=True)
     deleted = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
+
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
     class Meta:
         db_table = "field_type"
+        constraints = [
+            live_unique('field_type_name', 'field_type_live_name_uniq'),
+        ]
     def __str__(self):
         return self.field_type_name
 
 class EmployeeCustomFieldConfig(models.Model):
-    field_key = models.CharField(max_length=100, unique=True)  
+    field_key = models.CharField(max_length=100)  
     field_label = models.CharField(max_length=255)             
     field_type = models.ForeignKey(FieldType, on_delete=models.SET_NULL, null=True)
     is_selected = models.BooleanField(default=False)
     is_required = models.BooleanField(default=False)
+    # Keeps an expression index on Employee.custom_fields -> field_key
+    is_indexed = models.BooleanField(default=False)
 
     deleted = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
+
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
 
     class Meta:
         db_table = "employee_custom_field_config"
+        constraints = [
+            live_unique('field_key', 'custom_field_live_key_uniq'),
+        ]
 
     def __str__(self):
         return self.field_label
 
 class PhoneCountryCode(models.Model):
-    code = models.CharField(max_length=10, unique=True,null=True, blank=True)   
+    code = models.CharField(max_length=10,null=True, blank=True)   
     country = models.CharField(max_length=100,null=True, blank=True)            
     deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
+
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            live_unique('code', 'phone_country_code_live_code_uniq'),
+        ]
 
     def __str__(self):
         return f"{self.country} ({self.code})"
@@ -134,9 +235,9 @@ class Employee(models.Model):
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
     user = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True)
-    phone_number = models.CharField(max_length=15, unique=True)
+    phone_number = models.CharField(max_length=15)
     phone_country_code = models.ForeignKey(PhoneCountryCode, on_delete=models.DO_NOTHING,null=True, blank=True  )
-    emirates_id = models.CharField(max_length=50, unique=True,null=True, blank=True)
+    emirates_id = models.CharField(max_length=50,null=True, blank=True)
     passport_number = models.CharField(max_length=50, blank=True, null=True)
     labour_card_number = models.CharField(max_length=50, blank=True, null=True)
     visa_expiry = models.DateField(blank=True, null=True)
@@ -150,24 +251,68 @@ class Employee(models.Model):
     bank = models.ForeignKey(Bank, on_delete=models.SET_NULL, null=True)
     mohre_establishment_id = models.CharField(max_length=100, blank=True, null=True)
     job_title = models.ForeignKey(JobTitle, on_delete=models.SET_NULL, null=True)
-    iban = models.CharField(max_length=50,unique=True)
+    iban = models.CharField(max_length=50)
     
     custom_fields = models.JSONField(blank=True, null=True)
     
     deleted = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
+
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
 
     class Meta:
         db_table = 'Employee'
+        constraints = [
+            live_unique('phone_number', 'employee_live_phone_uniq'),
+            live_unique('emirates_id', 'employee_live_emirates_id_uniq'),
+            live_unique('iban', 'employee_live_iban_uniq'),
+        ]
         indexes = [
-        models.Index(fields=['deleted']),
-        models.Index(fields=['department']),
-        models.Index(fields=['location']),
+        # Partial indexes over live rows for the list filters, ending in the
+        # primary key so a filtered page is an ordered index range scan
+        models.Index(fields=['department', 'employee_id'], name='employee_live_department_idx', condition=models.Q(deleted=False)),
+        models.Index(fields=['location', 'employee_id'], name='employee_live_location_idx', condition=models.Q(deleted=False)),
+        models.Index(fields=['contract_type', 'employee_id'], name='employee_live_contract_idx', condition=models.Q(deleted=False)),
+        models.Index(fields=['job_title', 'employee_id'], name='employee_live_job_title_idx', condition=models.Q(deleted=False)),
+        models.Index(fields=['bank', 'employee_id'], name='employee_live_bank_idx', condition=models.Q(deleted=False)),
+        models.Index(fields=['designation', 'employee_id'], name='employee_live_designation_idx', condition=models.Q(deleted=False)),
+        models.Index(fields=['visa_expiry'], name='employee_live_visa_idx', condition=models.Q(deleted=False)),
+        models.Index(fields=['contract_start_date'], name='employee_live_contract_start', condition=models.Q(deleted=False)),
+        models.Index(fields=['contract_end_date'], name='employee_live_contract_end', condition=models.Q(deleted=False)),
+        # Delta sync walks every row, soft-deleted ones included, in change order
+        models.Index(fields=['updated_at', 'employee_id'], name='employee_changes_idx'),
     ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Values as loaded, diffed against on save for the change history;
+        # JSON is copied so in-place edits still show up as changes
+        instance._loaded_values = {
+            name: copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+            for name, value in zip(field_names, values)
+        }
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields:
+            refreshed = {self._meta.get_field(name).attname for name in fields}
+        else:
+            refreshed = {field.attname for field in self._meta.concrete_fields}
+        self._loaded_values = {
+            **getattr(self, "_loaded_values", {}),
+            **{
+                name: copy.deepcopy(self.__dict__[name])
+                for name in refreshed if name in self.__dict__
+            },
+        }
     
     
 
@@ -196,3 +341,102 @@ class Attachment(models.Model):
         return f"Attachment {self.id} for Employee {self.employee_id}"
     class Meta:
         db_table = 'attachment'
+
+
+class UploadSession(models.Model):
+    upload_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='upload_sessions')
+    original_filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, null=True, blank=True)
+    total_size = models.BigIntegerField()
+    chunk_size = models.IntegerField()
+    total_chunks = models.IntegerField()
+    attachment = models.OneToOneField(Attachment, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_session')
+    completed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'upload_session'
+
+    def __str__(self):
+        return f"Upload {self.upload_id} of {self.original_filename}"
+
+
+class UploadChunk(models.Model):
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='chunks')
+    index = models.PositiveIntegerField()
+    size = models.IntegerField()
+    part_url = models.CharField(max_length=500)
+    received_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'upload_chunk'
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'index'], name='upload_chunk_session_index'),
+        ]
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    DEAD = 'dead'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (DEAD, 'Dead'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_at = models.DateTimeField(default=now)
+    locked_by = models.CharField(max_length=100, null=True, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'job'
+        indexes = [
+            # Workers poll for due jobs; finished ones stay out of the index
+            models.Index(fields=['run_at', 'id'], name='job_due_idx', condition=models.Q(status='queued')),
+            models.Index(fields=['locked_at'], name='job_running_idx', condition=models.Q(status='running')),
+        ]
+
+    def __str__(self):
+        return f"Job {self.id} {self.name} ({self.status})"
+
+
+class EmployeeHistory(models.Model):
+    CREATED = 'create'
+    UPDATED = 'update'
+    DELETED = 'delete'
+    ACTION_CHOICES = [
+        (CREATED, 'Created'),
+        (UPDATED, 'Updated'),
+        (DELETED, 'Deleted'),
+    ]
+
+    # No FK constraint: history outlives the employee row it describes
+    employee = models.ForeignKey(Employee, on_delete=models.DO_NOTHING, db_constraint=False, related_name='history')
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    # {field: [old, new]}, FKs by id
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    version = models.PositiveIntegerField(null=True, blank=True)
+    changed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, db_constraint=False, related_name='+')
+    changed_at = models.DateTimeField(default=now)
+
+    class Meta:
+        db_table = 'employee_history'
+        indexes = [
+            models.Index(fields=['employee', 'changed_at'], name='employee_history_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_action_display()} employee {self.employee_id} at {self.changed_at}"
@@ -0,0 +1,107 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Keep full microsecond precision; DjangoJSONEncoder rounds datetimes to ms"""
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values):
+    """Encode the key values of the last row of a page into an opaque cursor"""
+    raw = json.dumps(list(values), cls=CursorEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, key_count):
+    """Decode a cursor produced by encode_cursor back into its key values"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Invalid cursor.")
+
+    if not isinstance(values, list) or len(values) != key_count:
+        raise InvalidCursor("Invalid cursor.")
+    return values
+
+
+def parse_limit(value, default_limit):
+    if value in (None, ""):
+        return default_limit
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise InvalidCursor("limit must be an integer.")
+    if limit < 1:
+        raise InvalidCursor("limit must be greater than zero.")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def keyset_filter(keys, values):
+    """Build the row-value comparison (k1, k2, ...) > (v1, v2, ...) as a Q object"""
+    condition = Q()
+    for i, key in enumerate(keys):
+        term = Q(**{f"{key}__gt": values[i]})
+        for prev_key, prev_value in zip(keys[:i], values[:i]):
+            term &= Q(**{prev_key: prev_value})
+        condition |= term
+    return condition
+
+
+def _key_values(row, keys):
+    if isinstance(row, dict):
+        return [row[key] for key in keys]
+    return [getattr(row, key) for key in keys]
+
+
+def paginate_keyset(queryset, request, keys=("pk",), default_limit=DEFAULT_PAGE_SIZE):
+    """
+    Return one page of `queryset` ordered by `keys` together with the cursor
+    for the next page (None on the last page).
+
+    Reads `limit` and `cursor` from the query string. Each page seeks past the
+    last key of the previous one instead of using OFFSET, so the cost of a page
+    does not grow with its depth. When `default_limit` is None and the caller
+    passes neither parameter the whole queryset is returned unchanged.
+    """
+    keys = tuple(keys)
+    limit = parse_limit(request.query_params.get("limit"), default_limit)
+    cursor = request.query_params.get("cursor")
+
+    if limit is None and not cursor:
+        return list(queryset), None
+
+    queryset = queryset.order_by(*keys)
+    if cursor:
+        values = decode_cursor(cursor, len(keys))
+        try:
+            queryset = queryset.filter(keyset_filter(keys, values))
+        except (TypeError, ValueError, ValidationError):
+            # Well-formed JSON whose values do not fit the key columns
+            raise InvalidCursor("Invalid cursor.")
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE
+
+    rows = list(queryset[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor(_key_values(rows[-1], keys))
@@ -0,0 +1,162 @@
+from django.db import connection
+from django.db.models import Q
+
+SEARCH_TABLE = "employee_search"
+NAME_COLUMNS = ["first_name", "last_name"]
+IDENTIFIER_COLUMNS = ["phone_number", "emirates_id", "iban"]
+SEARCH_COLUMNS = NAME_COLUMNS + IDENTIFIER_COLUMNS
+
+# bm25 weights in SEARCH_COLUMNS order. Only the name columns are matched;
+# identifiers are looked up by equality instead (see search_employee_ids)
+COLUMN_WEIGHTS = [1.0, 1.0, 10.0, 10.0, 10.0]
+
+_COLUMNS = ", ".join(SEARCH_COLUMNS)
+_NEW_VALUES = ", ".join(f"NEW.{column}" for column in SEARCH_COLUMNS)
+
+CREATE_TABLE_SQL = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        {_COLUMNS},
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+"""
+
+# Only live employees are indexed; soft-deleting one drops it from the index
+TRIGGERS_SQL = {
+    f"{SEARCH_TABLE}_after_insert": f"""
+        CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_after_insert
+        AFTER INSERT ON "Employee" WHEN NEW.deleted = 0
+        BEGIN
+            INSERT INTO {SEARCH_TABLE} (rowid, {_COLUMNS})
+            VALUES (NEW.employee_id, {_NEW_VALUES});
+        END
+    """,
+    f"{SEARCH_TABLE}_after_update": f"""
+        CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_after_update
+        AFTER UPDATE OF {_COLUMNS}, deleted ON "Employee"
+        BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = OLD.employee_id;
+            INSERT INTO {SEARCH_TABLE} (rowid, {_COLUMNS})
+            SELECT NEW.employee_id, {_NEW_VALUES} WHERE NEW.deleted = 0;
+        END
+    """,
+    f"{SEARCH_TABLE}_after_delete": f"""
+        CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_after_delete
+        AFTER DELETE ON "Employee"
+        BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = OLD.employee_id;
+        END
+    """,
+}
+
+REBUILD_SQL = [
+    f"DELETE FROM {SEARCH_TABLE}",
+    f"""
+        INSERT INTO {SEARCH_TABLE} (rowid, {_COLUMNS})
+        SELECT employee_id, {_COLUMNS} FROM "Employee" WHERE deleted = 0
+    """,
+]
+
+
+def search_index_supported(conn=connection):
+    return conn.vendor == "sqlite"
+
+
+def install_search_index(conn=connection):
+    """
+    Create the FTS5 table and the triggers that keep it in sync with Employee,
+    rebuilding its contents if any trigger was missing.
+
+    Safe to call repeatedly. SQLite migrations that remake the Employee table
+    drop its triggers, so this also runs after every migrate.
+    """
+    if not search_index_supported(conn):
+        return
+
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'Employee'"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if set(TRIGGERS_SQL) <= existing:
+            return
+
+        cursor.execute(CREATE_TABLE_SQL)
+        for statement in TRIGGERS_SQL.values():
+            cursor.execute(statement)
+        for statement in REBUILD_SQL:
+            cursor.execute(statement)
+
+
+def drop_search_index(conn=connection):
+    if not search_index_supported(conn):
+        return
+
+    with conn.cursor() as cursor:
+        for name in TRIGGERS_SQL:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+def _quote(term):
+    return '"%s"' % term.replace('"', '""')
+
+
+def build_match_expression(query):
+    """Turn free text into an FTS5 MATCH expression: every word is a prefix match on the name columns"""
+    words = query.split()
+    names = " AND ".join(f"{_quote(word)}*" for word in words)
+    return f"{{{' '.join(NAME_COLUMNS)}}} : ({names})"
+
+
+def _identifier_ids(query, limit):
+    """Exact matches on the identifier columns, served by their live unique indexes"""
+    from .models import Employee
+
+    condition = Q()
+    for column in IDENTIFIER_COLUMNS:
+        condition |= Q(**{column: query})
+    return list(
+        Employee.objects.filter(condition)
+        .order_by("employee_id")
+        .values_list("employee_id", flat=True)[:limit]
+    )
+
+
+def _name_ids(query, limit):
+    if not search_index_supported():
+        from .models import Employee
+
+        name_match = Q()
+        for word in query.split():
+            name_match &= Q(first_name__istartswith=word) | Q(last_name__istartswith=word)
+        return list(
+            Employee.objects.filter(name_match)
+            .order_by("employee_id")
+            .values_list("employee_id", flat=True)[:limit]
+        )
+
+    weights = ", ".join(str(weight) for weight in COLUMN_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s "
+            f"ORDER BY bm25({SEARCH_TABLE}, {weights}) LIMIT %s",
+            [build_match_expression(query), limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_employee_ids(query, limit):
+    """
+    Return the ids of live employees matching `query`, best match first: an
+    exact phone number, Emirates ID or IBAN ahead of name prefix matches.
+    """
+    if not query.split():
+        return []
+
+    ids = _identifier_ids(query.strip(), limit)
+    for employee_id in _name_ids(query, limit):
+        if len(ids) >= limit:
+            break
+        if employee_id not in ids:
+            ids.append(employee_id)
+    return ids
@@ -9,36 +9,109 @@ class EmployeeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Employee
         fields = "__all__"
+        read_only_fields = ["version"]
+
+class EmployeeReadSerializer(EmployeeSerializer):
+    """Employee representation with the names of its lookups resolved"""
+    phone_code = serializers.CharField(source='phone_country_code.code', read_only=True, allow_null=True)
+    contract_type_name = serializers.CharField(source='contract_type.contract_type_name', read_only=True, allow_null=True)
+    department_name = serializers.CharField(source='department.department_name', read_only=True, allow_null=True)
+    designation_name = serializers.CharField(source='designation.designation_name', read_only=True, allow_null=True)
+    location_name = serializers.CharField(source='location.Location_name', read_only=True, allow_null=True)
+    bank_name = serializers.CharField(source='bank.bank_name', read_only=True, allow_null=True)
+    job_title_name = serializers.CharField(source='job_title.job_title_name', read_only=True, allow_null=True)
+
+    related_fields = [
+        'phone_country_code', 'contract_type', 'department',
+        'designation', 'location', 'bank', 'job_title',
+    ]
+
+    class Meta(EmployeeSerializer.Meta):
+        pass
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def parse_fields(cls, value):
+        """Turn a comma separated `fields=` parameter into a list of field names"""
+        if not value:
+            return None
+        fields = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = [name for name in fields if name not in cls().fields]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown fields: {', '.join(unknown)}")
+        return fields
+
+    @classmethod
+    def related_for(cls, fields=None):
+        """Lookups that have to be joined to render `fields`"""
+        if fields is None:
+            return list(cls.related_fields)
+        declared = cls().fields
+        return [
+            declared[name].source.split(".")[0]
+            for name in fields if "." in declared[name].source
+        ]
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None):
+        """
+        Join the lookups up front so serializing a page costs one query. When
+        `fields` is given only the columns and joins those fields need are
+        selected.
+        """
+        if fields is None:
+            return queryset.select_related(*cls.related_fields)
+
+        declared = cls().fields
+        columns, related = [], []
+        for name in fields:
+            source = declared[name].source
+            columns.append(source.replace(".", "__"))
+            if "." in source:
+                columns.append(source.split(".")[0])
+                related.append(source.split(".")[0])
+        return queryset.select_related(*related).only(*columns)
 
 class ContractTypeSerializer(serializers.ModelSerializer):
     class Meta:
         model = ContractType
         fields = "__all__"
+        read_only_fields = ["version"]
 
 class JobTitleSerializer(serializers.ModelSerializer):
     class Meta:
         model = JobTitle
         fields = "__all__"
+        read_only_fields = ["version"]
 
 class DepartmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Department
         fields = "__all__"
+        read_only_fields = ["version"]
 
 class LocationsSerializer(serializers.ModelSerializer):
     class Meta:
         model = Locations
         fields = "__all__"
+        read_only_fields = ["version"]
 
 class BankSerializer(serializers.ModelSerializer):
     class Meta:
         model = Bank
         fields = "__all__"
+        read_only_fields = ["version"]
 
 class FieldTypeSerializer(serializers.ModelSerializer):
     class Meta:
         model = FieldType
         fields = "__all__"
+        read_only_fields = ["version"]
 
 class PhoneCountryCodeDropdownSerializer(serializers.ModelSerializer):
     value = serializers.CharField(source='code')
@@ -47,6 +120,12 @@ class PhoneCountryCodeDropdownSerializer(serializers.ModelSerializer):
         model = PhoneCountryCode
         fields = ['id', 'value']
 
+class PhoneCountryCodeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PhoneCountryCode
+        fields = "__all__"
+        read_only_fields = ["version"]
+
 class PhoneCountryCodeCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = PhoneCountryCode
@@ -56,6 +135,7 @@ class CreateCustomFieldSerializer(serializers.ModelSerializer):
     class Meta:
         model = EmployeeCustomFieldConfig
         fields = "__all__"
+        read_only_fields = ["version"]
 
 # class EmployeeCustomFieldSerializer(serializers.ModelSerializer):
 #     class Meta:
@@ -69,6 +149,7 @@ class CustomFieldConfigListSerializer(serializers.ModelSerializer):
     class Meta:
         model = EmployeeCustomFieldConfig
         fields = '__all__'
+        read_only_fields = ['version']
     
 # class BranchSerializer(serializers.ModelSerializer):
 #     class Meta:
@@ -81,9 +162,17 @@ class DesignationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Designation
         fields = '__all__'
+        read_only_fields = ['version']
 
 class AttachmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Attachment
         fields = '__all__'
-        read_only_fields = ['uploaded_at', 'original_filename', 'file_size']
\ No newline at end of file
+        read_only_fields = ['uploaded_at', 'original_filename', 'file_size']
+
+class EmployeeHistorySerializer(serializers.ModelSerializer):
+    changed_by_username = serializers.CharField(source='changed_by.username', read_only=True, allow_null=True)
+
+    class Meta:
+        model = EmployeeHistory
+        fields = ['id', 'employee', 'action', 'changes', 'version', 'changed_by', 'changed_by_username', 'changed_at']
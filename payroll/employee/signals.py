@@ -0,0 +1,70 @@
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from .cache import bump_table_version
+from .custom_fields import sync_custom_field_indexes
+from .history import record_created, record_deleted, record_saved
+from .models import (
+    Bank, ContractType, Department, Designation, Employee, EmployeeCustomFieldConfig, FieldType,
+    JobTitle, Locations, PhoneCountryCode,
+)
+from .search import install_search_index
+from .stats import invalidate_employee_stats
+
+
+@receiver(post_migrate)
+def restore_search_index(sender, using, **kwargs):
+    if sender.name == "employee":
+        install_search_index(connections[using])
+        # Table remakes only carry over the indexes declared in Meta
+        sync_custom_field_indexes(using)
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+@receiver(post_save, sender=Locations)
+@receiver(post_delete, sender=Locations)
+@receiver(post_save, sender=ContractType)
+@receiver(post_delete, sender=ContractType)
+def expire_employee_stats(sender, **kwargs):
+    invalidate_employee_stats()
+
+
+@receiver(post_save, sender=EmployeeCustomFieldConfig)
+@receiver(post_delete, sender=EmployeeCustomFieldConfig)
+def update_custom_field_indexes(sender, using, **kwargs):
+    # DDL has to wait until the config change is committed
+    transaction.on_commit(lambda: sync_custom_field_indexes(using), using=using)
+
+
+@receiver(post_save, sender=Employee)
+def record_employee_save(sender, instance, created, update_fields, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        record_created(instance)
+    else:
+        record_saved(instance, update_fields)
+
+
+@receiver(post_delete, sender=Employee)
+def record_employee_delete(sender, instance, **kwargs):
+    record_deleted(instance)
+
+
+LOOKUP_MODELS = [
+    ContractType, JobTitle, Department, Locations, Bank, FieldType,
+    PhoneCountryCode, Designation, EmployeeCustomFieldConfig,
+]
+
+
+def expire_lookup_cache(sender, **kwargs):
+    bump_table_version(sender)
+
+
+for model in LOOKUP_MODELS:
+    post_save.connect(expire_lookup_cache, sender=model, dispatch_uid=f"expire_lookup_cache_{model.__name__}")
+    post_delete.connect(expire_lookup_cache, sender=model, dispatch_uid=f"expire_lookup_cache_{model.__name__}")
@@ -0,0 +1,103 @@
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils.timezone import now
+
+from .models import Employee
+
+STATS_CACHE_KEY = "employee_stats:{day}"
+STATS_CACHE_TIMEOUT = 300
+
+DIMENSIONS = [
+    ("department", "department__department_name"),
+    ("location", "location__Location_name"),
+    ("contract_type", "contract_type__contract_type_name"),
+]
+
+
+def _bucket_counts(field, today, buckets):
+    """Conditional counts of `field` relative to today, keyed by bucket name"""
+    counts = {
+        f"{field}__none": Count("pk", filter=Q(**{f"{field}__isnull": True})),
+        f"{field}__past": Count("pk", filter=Q(**{f"{field}__lt": today})),
+    }
+    start = 0
+    for end in buckets:
+        counts[f"{field}__{start}_{end}_days"] = Count("pk", filter=Q(**{
+            f"{field}__gte": today + timedelta(days=start),
+            f"{field}__lte": today + timedelta(days=end),
+        }))
+        start = end + 1
+    counts[f"{field}__over_{start - 1}_days"] = Count(
+        "pk", filter=Q(**{f"{field}__gt": today + timedelta(days=start - 1)})
+    )
+    return counts
+
+
+def _group(aggregate, field):
+    prefix = f"{field}__"
+    return {key[len(prefix):]: value for key, value in aggregate.items() if key.startswith(prefix)}
+
+
+def _totals(pivot, dimension):
+    totals = {}
+    for row in pivot:
+        key = row[dimension]
+        if key["id"] not in totals:
+            totals[key["id"]] = {"id": key["id"], "name": key["name"], "count": 0}
+        totals[key["id"]]["count"] += row["count"]
+    return sorted(totals.values(), key=lambda item: -item["count"])
+
+
+def compute_employee_stats(today):
+    employees = Employee.objects.order_by()
+
+    group_fields = []
+    for field, name_path in DIMENSIONS:
+        group_fields += [f"{field}_id", name_path]
+    pivot = [
+        {
+            **{
+                field: {"id": row[f"{field}_id"], "name": row[name_path]}
+                for field, name_path in DIMENSIONS
+            },
+            "count": row["count"],
+        }
+        for row in employees.values(*group_fields).annotate(count=Count("pk"))
+    ]
+
+    buckets = employees.aggregate(
+        total=Count("pk"),
+        **_bucket_counts("visa_expiry", today, [30, 60, 90]),
+        **_bucket_counts("contract_end_date", today, [30, 90]),
+    )
+
+    return {
+        "total": buckets["total"],
+        "pivot": pivot,
+        **{f"by_{field}": _totals(pivot, field) for field, _ in DIMENSIONS},
+        "visa_expiry": _group(buckets, "visa_expiry"),
+        "contract_end_date": _group(buckets, "contract_end_date"),
+        "generated_at": now(),
+    }
+
+
+def get_employee_stats():
+    """Headcount pivots for today, served from cache until an employee changes"""
+    today = date.today()
+    key = STATS_CACHE_KEY.format(day=today.isoformat())
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_employee_stats(today)
+        cache.set(key, stats, STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_employee_stats():
+    """
+    Drop today's stats once the current transaction commits; dropping them
+    earlier would let a concurrent request cache a recount that misses it.
+    """
+    transaction.on_commit(lambda: cache.delete(STATS_CACHE_KEY.format(day=date.today().isoformat())))
@@ -0,0 +1,259 @@
+import functools
+import io
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+ATTACHMENT_FOLDER = "attachments"
+UPLOAD_WORKERS = 8
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadError(Exception):
+    pass
+
+
+class AttachmentStorage:
+    """
+    Where attachment files live. save() returns the URL stored in
+    Attachment.document; open() and delete() take that URL back.
+
+    Backends implement write(), which consumes an iterable of byte chunks so
+    a file is never held in memory as a whole.
+    """
+
+    base_url = ""
+    # Whether write() and read_chunks() work, which chunked uploads rely on
+    supports_streaming = True
+
+    def url(self, name):
+        return self.base_url + name
+
+    def name(self, url):
+        if not url or not url.startswith(self.base_url):
+            return None
+        return unquote(url[len(self.base_url):])
+
+    def save(self, uploaded_file, folder, prefix):
+        name = f"{folder}/{prefix}_{os.path.basename(uploaded_file.name)}"
+        self.write(
+            name,
+            uploaded_file.chunks(),
+            size=uploaded_file.size,
+            content_type=getattr(uploaded_file, "content_type", None),
+        )
+        return self.url(name)
+
+    def compose(self, name, part_urls, size=None, content_type=None):
+        """Write `name` as the concatenation of `part_urls`, one chunk at a time"""
+        chunks = (chunk for url in part_urls for chunk in self.read_chunks(url))
+        self.write(name, chunks, size=size, content_type=content_type)
+        return self.url(name)
+
+    def read_chunks(self, url, chunk_size=STREAM_CHUNK_SIZE):
+        with self.open(url) as source:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def write(self, name, chunks, size=None, content_type=None):
+        raise NotImplementedError
+
+    def open(self, url):
+        raise NotImplementedError
+
+    def delete(self, url):
+        raise NotImplementedError
+
+
+class LocalAttachmentStorage(AttachmentStorage):
+    """Stores attachments on local disk, for development and offline testing"""
+
+    def __init__(self, root=None, base_url=None):
+        self.root = root or getattr(settings, "ATTACHMENT_LOCAL_ROOT", settings.BASE_DIR / "media")
+        self.base_url = base_url or getattr(settings, "ATTACHMENT_LOCAL_URL", "/media/")
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def write(self, name, chunks, size=None, content_type=None):
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as destination:
+            for chunk in chunks:
+                destination.write(chunk)
+
+    def open(self, url):
+        return open(self.path(self.name(url)), "rb")
+
+    def delete(self, url):
+        name = self.name(url)
+        if name is None:
+            return
+        try:
+            os.remove(self.path(name))
+        except FileNotFoundError:
+            pass
+
+
+class InMemoryAttachmentStorage(AttachmentStorage):
+    """Keeps attachments in a process-wide dict, for tests and load testing"""
+
+    base_url = "memory://"
+    blobs = {}
+    _lock = threading.Lock()
+
+    def write(self, name, chunks, size=None, content_type=None):
+        content = b"".join(chunks)
+        with self._lock:
+            self.blobs[name] = content
+
+    def open(self, url):
+        return io.BytesIO(self.blobs[self.name(url)])
+
+    def delete(self, url):
+        with self._lock:
+            self.blobs.pop(self.name(url), None)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls.blobs.clear()
+
+
+class AzureBlobAttachmentStorage(AttachmentStorage):
+    """
+    Azure Blob Storage through the azure-storage-blob SDK.
+
+    One instance lives per process (see get_attachment_storage) and its
+    client is thread-safe, so every upload reuses the same pooled HTTPS
+    connections instead of opening a new one per file.
+    """
+
+    def __init__(self, connection_string=None, container=None):
+        try:
+            from azure.storage.blob import BlobServiceClient
+        except ImportError:
+            raise ImproperlyConfigured("The azure storage backend requires the azure-storage-blob package.")
+
+        connection_string = connection_string or getattr(settings, "AZURE_STORAGE_CONNECTION_STRING", None)
+        container = container or getattr(settings, "AZURE_STORAGE_CONTAINER", None)
+        if not connection_string or not container:
+            raise ImproperlyConfigured("AZURE_STORAGE_CONNECTION_STRING and AZURE_STORAGE_CONTAINER must be set.")
+
+        service = BlobServiceClient.from_connection_string(connection_string)
+        self.container = service.get_container_client(container)
+        self.base_url = self.container.url.rstrip("/") + "/"
+
+    def write(self, name, chunks, size=None, content_type=None):
+        from azure.storage.blob import ContentSettings
+
+        self.container.get_blob_client(name).upload_blob(
+            chunks,
+            length=size,
+            overwrite=True,
+            content_settings=ContentSettings(content_type=content_type) if content_type else None,
+        )
+
+    def open(self, url):
+        return self.container.get_blob_client(self.name(url)).download_blob()
+
+    def read_chunks(self, url, chunk_size=STREAM_CHUNK_SIZE):
+        yield from self.open(url).chunks()
+
+    def delete(self, url):
+        name = self.name(url)
+        if name is not None:
+            self.container.get_blob_client(name).delete_blob(delete_snapshots="include")
+
+
+class AzureUploadHelperStorage(AttachmentStorage):
+    """Blob storage through the deployment's payroll/azure_upload.py helper"""
+
+    supports_streaming = False
+
+    def save(self, uploaded_file, folder, prefix):
+        from payroll.azure_upload import upload_file_to_azure as legacy_upload
+
+        url = legacy_upload(uploaded_file, folder_name=folder, prefix=prefix)
+        if not url:
+            raise UploadError(f"File upload failed for {uploaded_file.name}")
+        return url
+
+    def delete(self, url):
+        # The helper cannot delete; leave a trail so the blob can be removed by hand
+        logger.warning("Orphaned attachment blob %s", url)
+
+
+STORAGE_BACKENDS = {
+    "azure": AzureBlobAttachmentStorage,
+    "azure_upload": AzureUploadHelperStorage,
+    "local": LocalAttachmentStorage,
+    "memory": InMemoryAttachmentStorage,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _storage(backend):
+    try:
+        return STORAGE_BACKENDS[backend]()
+    except KeyError:
+        raise ImproperlyConfigured(f"Unknown ATTACHMENT_STORAGE backend {backend!r}.")
+
+
+def get_attachment_storage():
+    """The configured backend, built once per process so its clients persist"""
+    return _storage(getattr(settings, "ATTACHMENT_STORAGE", "azure_upload"))
+
+
+# Shared by all requests so concurrent uploads stay bounded process-wide
+_upload_pool = ThreadPoolExecutor(
+    max_workers=getattr(settings, "ATTACHMENT_UPLOAD_WORKERS", UPLOAD_WORKERS),
+    thread_name_prefix="attachment-upload",
+)
+
+
+def discard_attachments(urls, storage=None):
+    """Best-effort removal of uploaded blobs whose database rows were never written"""
+    storage = storage or get_attachment_storage()
+    for url in urls:
+        try:
+            storage.delete(url)
+        except Exception:
+            logger.exception("Could not delete attachment blob %s", url)
+
+
+def upload_attachments(files, folder=ATTACHMENT_FOLDER, storage=None):
+    """
+    Upload `files` concurrently and return their URLs in the same order.
+
+    Call this outside transaction.atomic() so no write lock is held during the
+    network round trips. If any upload fails the others are discarded and the
+    first error is raised.
+    """
+    storage = storage or get_attachment_storage()
+    futures = [
+        _upload_pool.submit(storage.save, uploaded_file, folder, str(uuid.uuid4()))
+        for uploaded_file in files
+    ]
+
+    urls, error = [], None
+    for future in futures:
+        try:
+            urls.append(future.result())
+        except Exception as e:
+            error = error or e
+    if error is not None:
+        discard_attachments(urls, storage)
+        raise error
+    return urls
@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+
+from .accounts import provision_employee_passwords
+from .jobs import register_job
+from .storage import discard_attachments
+from .uploads import expire_upload_session
+
+User = get_user_model()
+
+
+@register_job("set_employee_password")
+def set_employee_password(user_id):
+    user = User.objects.filter(pk=user_id).first()
+    if user is not None and not user.has_usable_password():
+        user.set_password(user.username)
+        user.save(update_fields=["password"])
+
+
+@register_job("provision_employee_passwords")
+def provision_passwords():
+    provision_employee_passwords()
+
+
+@register_job("discard_attachments")
+def discard_attachment_blobs(urls):
+    discard_attachments(urls)
+
+
+@register_job("expire_upload_session")
+def expire_upload(upload_id):
+    expire_upload_session(upload_id)
@@ -1,3 +1,908 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import authenticate, get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from . import cache as lookup_cache
+from . import history, jobs, stats, storage, uploads
+from .models import (
+    Attachment, Department, Employee, EmployeeCustomFieldConfig, EmployeeHistory, Job, Locations, UploadChunk,
+    UploadSession,
+)
+from .pagination import encode_cursor
+from .uploads import MIN_CHUNK_SIZE
+from .validators import validate_employee_payloads
+
+User = get_user_model()
+
+
+def make_employee(phone="0501234567", iban="AE070331234567890123456", **kwargs):
+    user = User.objects.create_user(username=phone, password=None)
+    return Employee.objects.create(
+        user=user, first_name="Sara", last_name="Khan", phone_number=phone, iban=iban, **kwargs
+    )
+
+
+def employee_payload(**overrides):
+    return {
+        "first_name": "Sara",
+        "last_name": "Khan",
+        "phone_number": "0501234567",
+        "iban": "AE070331234567890123456",
+        "emirates_id": "784-1990-1234567-1",
+        "labour_card_number": "LC1",
+        "mohre_establishment_id": "M1",
+        **overrides,
+    }
+
+
+class APITestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        # The UAE bank code table does not know the test IBANs
+        patcher = mock.patch("employee.validators.validate_uae_iban", return_value=(True, None))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Keep the background history thread away from the test database
+        patcher = mock.patch.object(history.writer, "add")
+        self.history_add = patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class SoftDeleteTests(APITestCase):
+    def test_default_manager_hides_soft_deleted_rows(self):
+        live = Department.objects.create(department_name="Finance")
+        Department.objects.create(department_name="Sales", deleted=True)
+
+        self.assertEqual(list(Department.objects.all()), [live])
+        self.assertEqual(Department.all_objects.count(), 2)
+
+    def test_soft_deleted_lookup_name_can_be_reused(self):
+        department = Department.objects.create(department_name="Finance")
+        self.client.delete(f"/employee/delete_department/{department.pk}/")
+
+        response = self.client.post("/employee/create_department/", {"department_name": "Finance"}, format="json")
+
+        self.assertEqual(response.json()["status"], 201)
+        self.assertEqual(Department.all_objects.filter(department_name="Finance").count(), 2)
+
+    def test_soft_deleted_employee_phone_can_be_reused(self):
+        employee = make_employee()
+        self.client.delete(f"/employee/delete_employee/{employee.pk}/")
+
+        response = self.client.post("/employee/create_employee/", employee_payload(), format="json")
+
+        self.assertEqual(response.json()["status"], 201)
+        self.assertEqual(Employee.objects.get().phone_number, "0501234567")
+        old_user = User.objects.get(pk=employee.user_id)
+        self.assertEqual(old_user.username, f"0501234567.deleted-{employee.pk}")
+        self.assertFalse(old_user.is_active)
+
+    def test_phone_taken_by_another_user_is_rejected(self):
+        User.objects.create_user(username="0501234567")
+
+        response = self.client.post("/employee/create_employee/", employee_payload(), format="json")
+
+        self.assertEqual(response.json()["status"], 400)
+        self.assertIn("phone_number", response.json()["errors"])
+
+
+class OptimisticConcurrencyTests(APITestCase):
+    def test_get_etag_is_accepted_as_if_match(self):
+        employee = make_employee()
+        etag = self.client.get(f"/employee/get_employee/{employee.pk}/")["ETag"]
+
+        response = self.client.patch(
+            f"/employee/update_employee/{employee.pk}/", {"first_name": "Mona"},
+            format="json", HTTP_IF_MATCH=etag,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], '"2"')
+
+    def test_stale_if_match_is_rejected(self):
+        employee = make_employee()
+        etag = self.client.get(f"/employee/get_employee/{employee.pk}/")["ETag"]
+        self.client.patch(f"/employee/update_employee/{employee.pk}/", {"first_name": "Mona"}, format="json")
+
+        response = self.client.patch(
+            f"/employee/update_employee/{employee.pk}/", {"last_name": "Ali"},
+            format="json", HTTP_IF_MATCH=etag,
+        )
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["current_version"], 2)
+        employee.refresh_from_db()
+        self.assertEqual(employee.last_name, "Khan")
+
+    def test_detail_etag_changes_when_a_displayed_lookup_is_renamed(self):
+        department = Department.objects.create(department_name="Finance")
+        employee = make_employee(department=department)
+        url = f"/employee/get_employee/{employee.pk}/"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        department.department_name = "Treasury"
+        department.save()
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_lookup_detail_etag_round_trips_through_update(self):
+        department = Department.objects.create(department_name="Finance")
+        etag = self.client.get(f"/employee/get_department/{department.pk}/")["ETag"]
+
+        response = self.client.put(
+            f"/employee/update_department/{department.pk}/", {"department_name": "Treasury"},
+            format="json", HTTP_IF_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.put(
+            f"/employee/update_department/{department.pk}/", {"department_name": "Audit"},
+            format="json", HTTP_IF_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 409)
+
+    def test_lookup_delete_honours_if_match_and_bumps_version(self):
+        department = Department.objects.create(department_name="Finance")
+        etag = self.client.get(f"/employee/get_department/{department.pk}/")["ETag"]
+        self.client.put(f"/employee/update_department/{department.pk}/", {"department_name": "Treasury"}, format="json")
+
+        stale = self.client.delete(f"/employee/delete_department/{department.pk}/", HTTP_IF_MATCH=etag)
+        self.assertEqual(stale.status_code, 409)
+        self.assertTrue(Department.objects.filter(pk=department.pk).exists())
+
+        self.client.delete(f"/employee/delete_department/{department.pk}/")
+        department = Department.all_objects.get(pk=department.pk)
+        self.assertEqual((department.deleted, department.version, department.department_name), (True, 3, "Treasury"))
+
+    def test_employee_delete_honours_if_match(self):
+        employee = make_employee()
+        etag = self.client.get(f"/employee/get_employee/{employee.pk}/")["ETag"]
+        self.client.patch(f"/employee/update_employee/{employee.pk}/", {"first_name": "Mona"}, format="json")
+
+        response = self.client.delete(f"/employee/delete_employee/{employee.pk}/", HTTP_IF_MATCH=etag)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(User.objects.get(pk=employee.user_id).username, "0501234567")
+
+
+class LookupCacheTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        lookup_cache._local.clear()
+        lookup_cache._local_versions.clear()
+
+    def department_names(self):
+        response = self.client.get("/employee/list_departments/")
+        return [row["department_name"] for row in response.json()["data"]]
+
+    def test_write_invalidates_cached_list(self):
+        department = Department.objects.create(department_name="Finance")
+        self.assertEqual(self.department_names(), ["Finance"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(
+                f"/employee/update_department/{department.pk}/", {"department_name": "Treasury"}, format="json"
+            )
+
+        self.assertEqual(self.department_names(), ["Treasury"])
+
+    def test_change_from_another_process_expires_with_local_backend(self):
+        department = Department.objects.create(department_name="Finance")
+        self.assertEqual(self.department_names(), ["Finance"])
+
+        # No signal and no version bump here, as seen from a second process
+        Department.objects.filter(pk=department.pk).update(department_name="Treasury")
+        self.assertEqual(self.department_names(), ["Finance"])
+
+        later = lookup_cache.LOCAL_BACKEND_TIMEOUT + 1
+        real_time, real_monotonic = time.time, time.monotonic
+        with mock.patch("time.time", lambda: real_time() + later), \
+                mock.patch("time.monotonic", lambda: real_monotonic() + later):
+            self.assertEqual(self.department_names(), ["Treasury"])
+
+
+class CursorPaginationTests(APITestCase):
+    def test_pages_follow_the_cursor(self):
+        for i in range(3):
+            make_employee(phone=f"050000000{i}", iban=f"AE07033123456789012345{i}")
+
+        first = self.client.get("/employee/list_employees/", {"limit": 2}).json()
+        second = self.client.get("/employee/list_employees/", {"limit": 2, "cursor": first["next"]}).json()
+
+        self.assertEqual(len(first["data"]), 2)
+        self.assertEqual(len(second["data"]), 1)
+        self.assertIsNone(second["next"])
+
+    def test_malformed_cursors_are_rejected(self):
+        make_employee()
+        cases = [
+            ("/employee/list_employees/", encode_cursor(["x"])),
+            ("/employee/list_employees/", encode_cursor([[1]])),
+            ("/employee/list_employees/", encode_cursor([None])),
+            ("/employee/list_employees/", encode_cursor([1, 2])),
+            ("/employee/list_employees/", "not a cursor"),
+            ("/employee/changes/", encode_cursor(["bad", 1])),
+        ]
+        for url, cursor in cases:
+            with self.subTest(url=url, cursor=cursor):
+                response = self.client.get(url, {"cursor": cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()["error"], "Invalid cursor.")
+
+
+class PatchEmployeeTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.employee = make_employee(custom_fields={"shirt_size": "M"})
+        self.url = f"/employee/update_employee/{self.employee.pk}/"
+
+    def test_only_changed_fields_are_written(self):
+        response = self.client.patch(self.url, {"first_name": "Sara", "last_name": "Ali"}, format="json")
+
+        self.assertEqual(response.json()["updated_fields"], ["last_name"])
+        self.employee.refresh_from_db()
+        self.assertEqual((self.employee.last_name, self.employee.version), ("Ali", 2))
+
+    def test_unchanged_payload_is_a_no_op(self):
+        response = self.client.patch(self.url, {"phone_number": "0501234567"}, format="json")
+
+        self.assertEqual(response.json()["message"], "No changes.")
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.version, 1)
+
+    def test_value_of_another_live_employee_is_rejected(self):
+        make_employee(phone="0509999999", iban="AE070331234567890000000")
+
+        response = self.client.patch(
+            self.url, {"phone_number": "0509999999", "iban": "AE070331234567890000000"}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()["errors"]), {"phone_number", "iban"})
+
+    def test_custom_fields_can_be_cleared(self):
+        for value in (None, {}):
+            with self.subTest(value=value):
+                Employee.objects.filter(pk=self.employee.pk).update(custom_fields={"shirt_size": "M"})
+
+                response = self.client.patch(self.url, {"custom_fields": value}, format="json")
+
+                self.assertEqual(response.json()["updated_fields"], ["custom_fields"])
+                self.employee.refresh_from_db()
+                self.assertEqual(self.employee.custom_fields, value)
+
+
+class EmployeeChangesTests(APITestCase):
+    def test_empty_page_keeps_since_as_watermark(self):
+        make_employee()
+
+        response = self.client.get("/employee/changes/", {"since": "2999-01-01T00:00:00Z"}).json()
+
+        self.assertEqual(response["data"], [])
+        self.assertIsNotNone(response["watermark"])
+        resumed = self.client.get("/employee/changes/", {"cursor": response["watermark"]}).json()
+        self.assertEqual(resumed["data"], [])
+
+    def test_soft_deleted_employees_are_reported(self):
+        employee = make_employee()
+        self.client.delete(f"/employee/delete_employee/{employee.pk}/")
+
+        response = self.client.get("/employee/changes/", {"since": "2000-01-01T00:00:00Z"}).json()
+
+        self.assertEqual(response["data"], [
+            {"employee_id": employee.pk, "deleted": True, "updated_at": response["data"][0]["updated_at"]}
+        ])
+        self.assertIsNotNone(response["watermark"])
+
+
+class SearchEmployeesTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.sara = make_employee(emirates_id="784-1990-1234567-1")
+        self.omar = make_employee(
+            phone="0509999999", iban="AE070331234567890000000", emirates_id="784-1985-7654321-2",
+        )
+        Employee.objects.filter(pk=self.omar.pk).update(first_name="Omar", last_name="Sarraf")
+
+    def search(self, query):
+        response = self.client.get("/employee/search_employees/", {"q": query})
+        return [row["employee_id"] for row in response.json()["data"]]
+
+    def test_identifiers_match_exactly(self):
+        self.assertEqual(self.search("784-1985-7654321-2"), [self.omar.pk])
+        self.assertEqual(self.search("0501234567"), [self.sara.pk])
+        self.assertEqual(self.search("784"), [])
+        self.assertEqual(self.search("1"), [])
+
+    def test_names_match_by_prefix(self):
+        self.assertEqual(sorted(self.search("sar")), sorted([self.sara.pk, self.omar.pk]))
+        self.assertEqual(self.search("omar sar"), [self.omar.pk])
+
+
+class EmployeeHistoryTests(APITestCase):
+    def recorded(self):
+        return [(call.args[0].action, call.args[0].changes) for call in self.history_add.call_args_list]
+
+    def test_soft_delete_is_recorded_as_delete(self):
+        employee = make_employee()
+        self.history_add.reset_mock()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/employee/delete_employee/{employee.pk}/")
+
+        self.assertEqual(self.recorded(), [(EmployeeHistory.DELETED, {"deleted": [False, True]})])
+
+    def test_patch_records_the_changed_fields(self):
+        employee = make_employee()
+        self.history_add.reset_mock()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"/employee/update_employee/{employee.pk}/", {"last_name": "Ali"}, format="json")
+
+        self.assertEqual(self.recorded(), [(EmployeeHistory.UPDATED, {"last_name": ["Khan", "Ali"]})])
+
+
+class HistoryWriterTests(TestCase):
+    def test_locked_database_batch_is_retried(self):
+        writer = history.HistoryWriter()
+        entry = EmployeeHistory(employee_id=1, action=EmployeeHistory.UPDATED)
+        writer._queue.put(entry)
+        attempts = [OperationalError("database is locked"), None]
+
+        with mock.patch.object(EmployeeHistory.objects, "bulk_create", side_effect=attempts) as bulk_create, \
+                mock.patch.object(history, "HISTORY_RETRY_DELAY", 0), \
+                self.assertLogs("employee.history", "WARNING"):
+            writer.flush()
+
+        self.assertEqual(bulk_create.call_count, 2)
+        self.assertEqual(bulk_create.call_args.args[0], [entry])
+
+    def test_batch_is_dropped_after_max_attempts(self):
+        writer = history.HistoryWriter()
+        writer._queue.put(EmployeeHistory(employee_id=1, action=EmployeeHistory.UPDATED))
+
+        with mock.patch.object(EmployeeHistory.objects, "bulk_create", side_effect=OperationalError("locked")) as bulk_create, \
+                mock.patch.object(history, "HISTORY_RETRY_DELAY", 0), \
+                self.assertLogs("employee.history", "ERROR"):
+            writer.flush()
+
+        self.assertEqual(bulk_create.call_count, history.HISTORY_MAX_ATTEMPTS)
+
+
+class JobQueueTests(TestCase):
+    def expire_lease(self, job):
+        Job.objects.filter(pk=job.pk).update(locked_at=now() - jobs.LEASE_TIMEOUT * 2)
+
+    def test_expired_lease_is_requeued(self):
+        job = Job.objects.create(name="noop", status=Job.RUNNING, attempts=1, locked_by="w1")
+        self.expire_lease(job)
+
+        self.assertEqual(jobs.requeue_stale_jobs(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), (Job.QUEUED, None))
+
+    def test_expired_lease_without_attempts_left_is_dead_lettered(self):
+        job = Job.objects.create(name="noop", status=Job.RUNNING, attempts=5, max_attempts=5, locked_by="w1")
+        self.expire_lease(job)
+
+        self.assertEqual(jobs.requeue_stale_jobs(), 0)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DEAD)
+
+    def test_long_job_keeps_its_lease_by_extending_it(self):
+        def long_job():
+            self.expire_lease(job)
+            self.assertTrue(jobs.extend_lease())
+            jobs.requeue_stale_jobs()
+
+        with mock.patch.dict(jobs.JOB_HANDLERS, {"long": long_job}):
+            job = jobs.enqueue("long")
+            job = jobs.claim_job("w1")
+            self.assertTrue(jobs.run_job(job))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.SUCCEEDED, 1))
+
+    def test_lost_lease_is_not_overwritten_by_the_old_worker(self):
+        def slow_job():
+            self.expire_lease(job)
+            jobs.requeue_stale_jobs()
+            self.assertFalse(jobs.extend_lease())
+
+        with mock.patch.dict(jobs.JOB_HANDLERS, {"slow": slow_job}):
+            job = jobs.enqueue("slow")
+            job = jobs.claim_job("w1")
+            jobs.run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+
+
+class ImportEmployeesTests(APITestCase):
+    HEADER = "first_name,last_name,phone_number,iban,emirates_id,labour_card_number,mohre_establishment_id\n"
+
+    def upload(self, content, name="employees.csv"):
+        return self.client.post(
+            "/employee/import_employees/", {"file": SimpleUploadedFile(name, content)}, format="multipart"
+        )
+
+    def test_rows_are_imported(self):
+        row = "Sara,Khan,0501234567,AE070331234567890123456,784-1990-1234567-1,LC1,M1\n"
+
+        response = self.upload((self.HEADER + row).encode())
+
+        self.assertEqual(response.json()["created"], 1)
+        self.assertEqual(Employee.objects.get().phone_number, "0501234567")
+
+    def test_non_utf8_csv_is_rejected(self):
+        row = "Zo\u00eb,Khan,0501234567,AE070331234567890123456,784-1990-1234567-1,LC1,M1\n"
+
+        response = self.upload((self.HEADER + row).encode("cp1252"))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("UTF-8", response.json()["error"])
+
+    def test_unsupported_file_type_is_rejected(self):
+        self.assertEqual(self.upload(b"x", name="employees.txt").status_code, 400)
+
+
+class EmployeeStatsTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def total(self):
+        return self.client.get("/employee/employee_stats/").json()["data"]["total"]
+
+    def test_cached_stats_are_dropped_only_on_commit(self):
+        make_employee()
+        self.assertEqual(self.total(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_employee(phone="0509999999", iban="AE070331234567890000000")
+            self.assertIsNotNone(cache.get(stats.STATS_CACHE_KEY.format(day=stats.date.today().isoformat())))
+
+        self.assertEqual(self.total(), 2)
+
+
+class ListEmployeesTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.finance = Department.objects.create(department_name="Finance")
+        self.sales = Department.objects.create(department_name="Sales")
+        self.dubai = Locations.objects.create(Location_name="Dubai")
+
+    def list(self, **params):
+        return self.client.get("/employee/list_employees/", params)
+
+    def test_lookup_names_cost_no_extra_queries(self):
+        make_employee(department=self.finance, location=self.dubai)
+        with CaptureQueriesContext(connection) as one:
+            self.list()
+        for i in range(5):
+            make_employee(phone=f"050000000{i}", iban=f"AE07033123456789012345{i}", department=self.sales)
+
+        with CaptureQueriesContext(connection) as six:
+            rows = self.list().json()["data"]
+
+        self.assertEqual(len(six), len(one))
+        self.assertEqual(rows[0]["department_name"], "Finance")
+        self.assertEqual(rows[0]["location_name"], "Dubai")
+
+    def test_sparse_fields(self):
+        make_employee(department=self.finance)
+
+        rows = self.list(fields="employee_id,department_name").json()["data"]
+
+        self.assertEqual(rows, [{"employee_id": rows[0]["employee_id"], "department_name": "Finance"}])
+        self.assertEqual(self.list(fields="salary").status_code, 400)
+
+    def test_unchanged_list_is_not_modified(self):
+        make_employee()
+        etag = self.list()["ETag"]
+
+        self.assertEqual(self.client.get("/employee/list_employees/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        make_employee(phone="0509999999", iban="AE070331234567890000000")
+        self.assertEqual(self.client.get("/employee/list_employees/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def if_modified_since(self, url, last_modified):
+        return self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+    def test_deleted_employee_changes_last_modified(self):
+        employee = make_employee()
+        make_employee(phone="0509999999", iban="AE070331234567890000000")
+        Employee.objects.update(updated_at=now() - timedelta(days=1))
+        last_modified = self.list()["Last-Modified"]
+        self.assertEqual(self.if_modified_since("/employee/list_employees/", last_modified).status_code, 304)
+
+        self.client.delete(f"/employee/delete_employee/{employee.pk}/")
+
+        response = self.if_modified_since("/employee/list_employees/", last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["data"]), 1)
+
+    def test_deleted_lookup_changes_last_modified(self):
+        cache.clear()
+        lookup_cache._local.clear()
+        lookup_cache._local_versions.clear()
+        Department.objects.update(updated_at=now() - timedelta(days=1))
+        last_modified = self.client.get("/employee/list_departments/")["Last-Modified"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/employee/delete_department/{self.finance.pk}/")
+
+        response = self.if_modified_since("/employee/list_departments/", last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["department_name"] for row in response.json()["data"]], ["Sales"])
+
+    def test_fk_and_date_filters(self):
+        make_employee(department=self.finance, visa_expiry=date(2030, 1, 1))
+        make_employee(phone="0509999999", iban="AE070331234567890000000", department=self.sales, visa_expiry=date(2031, 1, 1))
+
+        def phones(**params):
+            return [row["phone_number"] for row in self.list(**params).json()["data"]]
+
+        self.assertEqual(phones(department=self.finance.pk), ["0501234567"])
+        self.assertEqual(phones(department=f"{self.finance.pk},{self.sales.pk}"), ["0501234567", "0509999999"])
+        self.assertEqual(phones(visa_expiry_from="2030-06-01"), ["0509999999"])
+        self.assertEqual(self.list(department="x", visa_expiry_to="01/01/2030").json()["error"].keys(),
+                         {"department", "visa_expiry_to"})
+
+    def test_indexed_custom_field_filter(self):
+        EmployeeCustomFieldConfig.objects.create(field_key="shirt_size", field_label="Shirt size", is_indexed=True)
+        make_employee(custom_fields={"shirt_size": "M"})
+        make_employee(phone="0509999999", iban="AE070331234567890000000", custom_fields={"shirt_size": "L"})
+
+        rows = self.list(**{"cf.shirt_size": "L"}).json()["data"]
+
+        self.assertEqual([row["phone_number"] for row in rows], ["0509999999"])
+        self.assertEqual(self.list(**{"cf.badge": "1"}).status_code, 400)
+
+
+class ExportEmployeesTests(APITestCase):
+    def export(self, export_format):
+        response = self.client.get("/employee/export_employees/", {"export_format": export_format})
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson_export(self):
+        make_employee(custom_fields={"shirt_size": "M"})
+
+        rows = [json.loads(line) for line in self.export("ndjson").splitlines()]
+
+        self.assertEqual([(row["phone_number"], row["custom_fields"]) for row in rows], [("0501234567", {"shirt_size": "M"})])
+
+    def test_csv_export(self):
+        make_employee(custom_fields={"shirt_size": "M"})
+
+        rows = list(csv.DictReader(io.StringIO(self.export("csv"))))
+
+        self.assertEqual(rows[0]["phone_number"], "0501234567")
+        self.assertEqual(json.loads(rows[0]["custom_fields"]), {"shirt_size": "M"})
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get("/employee/export_employees/", {"export_format": "xml"})
+        self.assertEqual(response.status_code, 400)
+
+
+class CreateEmployeeTests(APITestCase):
+    def test_batch_validation_resolves_lookups_in_bulk(self):
+        departments = [Department.objects.create(department_name=f"D{i}") for i in range(10)]
+        payloads = [
+            employee_payload(phone_number=f"05000000{i:02d}", department=department.pk)
+            for i, department in enumerate(departments)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            results = validate_employee_payloads(payloads)
+
+        self.assertTrue(all(result["is_valid"] for result in results))
+        self.assertEqual(results[3]["cleaned_data"]["department"], departments[3])
+        self.assertEqual(len(queries), 1)
+
+    @override_settings(EMPLOYEE_DEFER_PASSWORD_HASHING=True)
+    def test_password_is_set_on_first_login(self):
+        self.client.post("/employee/create_employee/", employee_payload(), format="json")
+
+        user = User.objects.get(username="0501234567")
+        self.assertFalse(user.has_usable_password())
+        self.assertTrue(Job.objects.filter(name="set_employee_password", payload={"user_id": user.pk}).exists())
+
+        self.assertEqual(authenticate(username="0501234567", password="0501234567"), user)
+        user.refresh_from_db()
+        self.assertTrue(user.check_password("0501234567"))
+        self.assertIsNone(authenticate(username="0501234567", password="wrong"))
+
+
+@override_settings(ATTACHMENT_STORAGE="memory")
+class AttachmentUploadTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        storage._storage.cache_clear()
+        self.addCleanup(storage._storage.cache_clear)
+        self.addCleanup(storage.InMemoryAttachmentStorage.clear)
+        self.employee = make_employee()
+
+    def test_files_are_uploaded_and_recorded(self):
+        files = [SimpleUploadedFile(f"doc{i}.pdf", f"content {i}".encode()) for i in range(3)]
+
+        response = self.client.post(
+            "/employee/upload_attachment/", {"file": files, "employee_id": self.employee.pk}, format="multipart"
+        )
+
+        self.assertEqual(response.status_code, 201)
+        backend = storage.get_attachment_storage()
+        for i, attachment in enumerate(Attachment.objects.order_by("original_filename")):
+            self.assertEqual(backend.open(attachment.document).read(), f"content {i}".encode())
+    def test_uploads_are_discarded_when_the_insert_fails(self):
+        files = [SimpleUploadedFile("doc.pdf", b"content")]
+
+        with mock.patch.object(Attachment.objects, "bulk_create", side_effect=OperationalError("locked")):
+            response = self.client.post(
+                "/employee/upload_attachment/", {"file": files, "employee_id": self.employee.pk}, format="multipart"
+            )
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(storage.InMemoryAttachmentStorage.blobs, {})
+
+    def test_chunked_upload_can_resume(self):
+        content = bytes(range(256)) * (MIN_CHUNK_SIZE // 256) + b"tail"
+        session = self.client.post("/employee/start_upload/", {
+            "employee_id": self.employee.pk, "filename": "scan.pdf",
+            "total_size": len(content), "chunk_size": MIN_CHUNK_SIZE,
+        }, format="json").json()
+        upload_id = session["upload_id"]
+
+        self.client.put(
+            f"/employee/upload_chunk/{upload_id}/1/", content[MIN_CHUNK_SIZE:], content_type="application/octet-stream"
+        )
+        incomplete = self.client.post(f"/employee/complete_upload/{upload_id}/")
+        status = self.client.get(f"/employee/upload_status/{upload_id}/").json()
+        self.client.put(
+            f"/employee/upload_chunk/{upload_id}/0/", content[:MIN_CHUNK_SIZE], content_type="application/octet-stream"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            complete = self.client.post(f"/employee/complete_upload/{upload_id}/")
+
+        self.assertEqual(session["total_chunks"], 2)
+        self.assertEqual(incomplete.status_code, 400)
+        self.assertEqual((status["received_chunks"], status["next_chunk"]), ([1], 0))
+        self.assertEqual(complete.status_code, 201)
+        attachment = Attachment.objects.get()
+        self.assertEqual(storage.get_attachment_storage().open(attachment.document).read(), content)
+    def test_chunk_of_the_wrong_size_is_rejected(self):
+        upload_id = self.client.post("/employee/start_upload/", {
+            "employee_id": self.employee.pk, "filename": "scan.pdf",
+            "total_size": MIN_CHUNK_SIZE + 1, "chunk_size": MIN_CHUNK_SIZE,
+        }, format="json").json()["upload_id"]
+
+        response = self.client.put(f"/employee/upload_chunk/{upload_id}/0/", b"x", content_type="application/octet-stream")
+
+        self.assertEqual(response.status_code, 400)
+
+    def start_upload_with_first_chunk(self, total_chunks=1):
+        upload_id = self.client.post("/employee/start_upload/", {
+            "employee_id": self.employee.pk, "filename": "scan.pdf",
+            "total_size": MIN_CHUNK_SIZE * total_chunks, "chunk_size": MIN_CHUNK_SIZE,
+        }, format="json").json()["upload_id"]
+        self.client.put(
+            f"/employee/upload_chunk/{upload_id}/0/", b"x" * MIN_CHUNK_SIZE, content_type="application/octet-stream"
+        )
+        return upload_id
+
+    def test_concurrent_completions_create_one_attachment(self):
+        upload_id = self.start_upload_with_first_chunk()
+        second = UploadSession.objects.get(pk=upload_id)
+        compose = storage.InMemoryAttachmentStorage.compose
+
+        def compose_while_second_call_arrives(backend, *args, **kwargs):
+            with self.assertRaises(uploads.UploadStateError):
+                uploads.complete_upload(second)
+            return compose(backend, *args, **kwargs)
+
+        with mock.patch.object(storage.InMemoryAttachmentStorage, "compose", compose_while_second_call_arrives):
+            uploads.complete_upload(UploadSession.objects.get(pk=upload_id))
+
+        self.assertEqual(Attachment.objects.count(), 1)
+
+    def test_failed_completion_can_be_retried(self):
+        upload_id = self.start_upload_with_first_chunk()
+
+        with mock.patch.object(storage.InMemoryAttachmentStorage, "compose", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                uploads.complete_upload(UploadSession.objects.get(pk=upload_id))
+        uploads.complete_upload(UploadSession.objects.get(pk=upload_id))
+
+        self.assertEqual(Attachment.objects.count(), 1)
+
+    def test_abandoned_upload_is_expired_with_its_parts(self):
+        upload_id = self.start_upload_with_first_chunk(total_chunks=2)
+        self.assertTrue(Job.objects.filter(name="expire_upload_session", payload={"upload_id": upload_id}).exists())
+        idle_since = now() - uploads.UPLOAD_SESSION_TTL - timedelta(hours=1)
+        UploadSession.objects.update(updated_at=idle_since)
+        UploadChunk.objects.update(received_at=idle_since)
+
+        uploads.expire_upload_session(upload_id)
+
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(storage.InMemoryAttachmentStorage.blobs, {})
+
+    def test_upload_in_progress_is_checked_again_later(self):
+        upload_id = self.start_upload_with_first_chunk(total_chunks=2)
+        Job.objects.all().delete()
+
+        uploads.expire_upload_session(upload_id)
+
+        self.assertTrue(UploadSession.objects.filter(pk=upload_id).exists())
+        self.assertGreater(Job.objects.get(name="expire_upload_session").run_at, now())
+
+
+class StorageBackendTests(TestCase):
+    def test_local_backend_round_trip(self):
+        with tempfile.TemporaryDirectory() as root:
+            backend = storage.LocalAttachmentStorage(root=root, base_url="/media/")
+
+            url = backend.save(SimpleUploadedFile("doc.pdf", b"content"), "attachments", "abc")
+
+            self.assertEqual(url, "/media/attachments/abc_doc.pdf")
+            with backend.open(url) as stored:
+                self.assertEqual(stored.read(), b"content")
+            backend.delete(url)
+            self.assertFalse(os.path.exists(os.path.join(root, "attachments", "abc_doc.pdf")))
+
+    @override_settings(ATTACHMENT_STORAGE="ftp")
+    def test_unknown_backend_is_improperly_configured(self):
+        storage._storage.cache_clear()
+        self.addCleanup(storage._storage.cache_clear)
+        with self.assertRaises(ImproperlyConfigured):
+            storage.get_attachment_storage()
+
+
+class FormBootstrapTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        lookup_cache._local.clear()
+        lookup_cache._local_versions.clear()
+
+    def test_bootstrap_returns_every_dropdown(self):
+        Department.objects.create(department_name="Finance")
+
+        body = self.client.get("/employee/form_bootstrap/").json()
+
+        self.assertEqual([row["department_name"] for row in body["departments"]], ["Finance"])
+        for key in ("contract_types", "job_titles", "locations", "banks", "phone_country_code_dropdown",
+                    "designations", "selected_custom_fields", "hash"):
+            self.assertIn(key, body)
+
+    def test_etag_tracks_lookup_changes(self):
+        etag = self.client.get("/employee/form_bootstrap/")["ETag"]
+        self.assertEqual(self.client.get("/employee/form_bootstrap/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Department.objects.create(department_name="Finance")
+
+        self.assertEqual(self.client.get("/employee/form_bootstrap/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class BulkLookupTests(APITestCase):
+    url = "/employee/bulk_departments/"
+
+    def test_items_are_created_together(self):
+        response = self.client.post(
+            self.url, {"items": [{"department_name": "Finance"}, {"department_name": "Sales"}]}, format="json"
+        )
+
+        self.assertEqual(response.json()["created"], 2)
+        self.assertEqual(sorted(Department.objects.values_list("department_name", flat=True)), ["Finance", "Sales"])
+
+    def test_batch_with_an_invalid_item_is_rejected_whole(self):
+        Department.objects.create(department_name="Finance")
+
+        response = self.client.post(
+            self.url, {"items": [{"department_name": "Sales"}, {"department_name": "Finance"}]}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()["errors"]), ["1"])
+        self.assertEqual(Department.objects.count(), 1)
+
+    def test_update_checks_versions(self):
+        finance = Department.objects.create(department_name="Finance")
+        sales = Department.objects.create(department_name="Sales")
+
+        stale = self.client.patch(self.url, {"items": [
+            {"id": finance.pk, "department_name": "Treasury", "version": 1},
+            {"id": sales.pk, "department_name": "Marketing", "version": 7},
+        ]}, format="json")
+        fresh = self.client.patch(self.url, {"items": [
+            {"id": finance.pk, "department_name": "Treasury", "version": 1},
+        ]}, format="json")
+
+        self.assertEqual(stale.status_code, 400)
+        self.assertIn("version", stale.json()["errors"]["1"])
+        self.assertEqual(fresh.json()["updated"], 1)
+        finance.refresh_from_db()
+        self.assertEqual((finance.department_name, finance.version), ("Treasury", 2))
+
+    def test_delete_is_soft_and_reports_missing_ids(self):
+        finance = Department.objects.create(department_name="Finance")
+
+        response = self.client.delete(self.url, {"ids": [finance.pk, 999]}, format="json")
+
+        self.assertEqual((response.json()["deleted"], response.json()["not_found"]), (1, [999]))
+        self.assertTrue(Department.all_objects.get(pk=finance.pk).deleted)
+
+
+class BulkUpdateEmployeesTests(APITestCase):
+    url = "/employee/bulk_update_employees/"
+
+    def setUp(self):
+        super().setUp()
+        self.finance = Department.objects.create(department_name="Finance")
+        self.sales = Department.objects.create(department_name="Sales")
+        self.first = make_employee(department=self.finance)
+        self.second = make_employee(phone="0509999999", iban="AE070331234567890000000", department=self.finance)
+
+    def test_employees_are_moved_by_id(self):
+        response = self.client.post(self.url, {"ids": [self.first.pk], "set": {"department": self.sales.pk}}, format="json")
+
+        self.assertEqual(response.json()["updated"], 1)
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual((self.first.department, self.second.department), (self.sales, self.finance))
+        self.assertEqual(self.first.version, 2)
+
+    def test_employees_are_moved_by_filter(self):
+        response = self.client.post(
+            self.url, {"filter": {"department": self.finance.pk}, "set": {"department": None}}, format="json"
+        )
+
+        self.assertEqual(response.json()["updated"], 2)
+        self.assertFalse(Employee.objects.filter(department__isnull=False).exists())
+
+    def test_deleted_target_is_rejected(self):
+        self.sales.deleted = True
+        self.sales.save()
+
+        response = self.client.post(self.url, {"ids": [self.first.pk], "set": {"department": self.sales.pk}}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("department", response.json()["errors"])
+
+    def test_misspelled_filter_key_is_rejected(self):
+        response = self.client.post(
+            self.url, {"filter": {"dept": self.finance.pk}, "set": {"department": self.sales.pk}}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()["errors"]["filter"]), ["dept"])
+        self.assertFalse(Employee.objects.filter(department=self.sales).exists())
+
+    def test_empty_filter_value_is_rejected(self):
+        for value in ("", None, []):
+            with self.subTest(value=value):
+                response = self.client.post(
+                    self.url, {"filter": {"department": value}, "set": {"department": None}}, format="json"
+                )
+
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(Employee.objects.filter(department=self.finance).count(), 2)
@@ -0,0 +1,165 @@
+import math
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils.timezone import now
+
+from .models import Attachment, UploadChunk, UploadSession
+from .jobs import enqueue
+from .storage import ATTACHMENT_FOLDER, discard_attachments, get_attachment_storage
+
+UPLOAD_PARTS_FOLDER = "upload_parts"
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+MIN_CHUNK_SIZE = 64 * 1024
+# Stays under DATA_UPLOAD_MAX_MEMORY_SIZE, which caps a PUT body read into memory
+MAX_CHUNK_SIZE = 2 * 1024 * 1024
+MAX_UPLOAD_SIZE = 100 * 1024 * 1024
+# An unfinished upload idle for this long is dropped along with its parts
+UPLOAD_SESSION_TTL = timedelta(days=1)
+
+
+class UploadStateError(ValueError):
+    pass
+
+
+def chunk_count(total_size, chunk_size):
+    return max(1, math.ceil(total_size / chunk_size))
+
+
+def expected_chunk_size(session, index):
+    if index < session.total_chunks - 1:
+        return session.chunk_size
+    return session.total_size - session.chunk_size * (session.total_chunks - 1)
+
+
+def received_indexes(session):
+    return list(session.chunks.order_by("index").values_list("index", flat=True))
+
+
+def upload_progress(session):
+    received = received_indexes(session)
+    missing = sorted(set(range(session.total_chunks)) - set(received))
+    return {
+        "upload_id": str(session.upload_id),
+        "employee_id": session.employee_id,
+        "original_filename": session.original_filename,
+        "total_size": session.total_size,
+        "chunk_size": session.chunk_size,
+        "total_chunks": session.total_chunks,
+        "received_chunks": received,
+        "next_chunk": missing[0] if missing else None,
+        "completed": session.completed_at is not None,
+        "attachment_id": session.attachment_id,
+    }
+
+
+def store_chunk(session, index, data):
+    """
+    Save one numbered part of `session` to storage. Re-sending a part
+    replaces it, so a client can resume from next_chunk after a dropped
+    connection.
+    """
+    if session.completed_at is not None:
+        raise UploadStateError("Upload is already complete.")
+    if not 0 <= index < session.total_chunks:
+        raise UploadStateError(f"Chunk index must be between 0 and {session.total_chunks - 1}.")
+    expected = expected_chunk_size(session, index)
+    if len(data) != expected:
+        raise UploadStateError(f"Chunk {index} must be {expected} bytes, got {len(data)}.")
+
+    storage = get_attachment_storage()
+    name = f"{UPLOAD_PARTS_FOLDER}/{session.upload_id}/{index:06d}"
+    storage.write(name, [data], size=len(data))
+    UploadChunk.objects.update_or_create(
+        session=session, index=index,
+        defaults={"size": len(data), "part_url": storage.url(name)},
+    )
+
+
+def complete_upload(session):
+    """
+    Assemble the parts of `session` into one attachment file and create its
+    Attachment row. The parts are streamed through storage one chunk at a
+    time and deleted afterwards by a background job.
+
+    The session is claimed with a conditional UPDATE before anything is
+    written, so of two concurrent calls only one creates the attachment.
+    """
+    if session.completed_at is not None:
+        raise UploadStateError("Upload is already complete.")
+    chunks = list(session.chunks.order_by("index"))
+    missing = sorted(set(range(session.total_chunks)) - {chunk.index for chunk in chunks})
+    if missing:
+        raise UploadStateError(f"Missing chunks: {missing}.")
+
+    claimed_at = now()
+    claimed = UploadSession.objects.filter(pk=session.pk, completed_at__isnull=True).update(
+        completed_at=claimed_at, updated_at=claimed_at
+    )
+    if not claimed:
+        raise UploadStateError("Upload is already complete.")
+
+    storage = get_attachment_storage()
+    part_urls = [chunk.part_url for chunk in chunks]
+    url = None
+    try:
+        url = storage.compose(
+            f"{ATTACHMENT_FOLDER}/{session.upload_id}_{session.original_filename}",
+            part_urls,
+            size=session.total_size,
+            content_type=session.content_type,
+        )
+        with transaction.atomic():
+            attachment = Attachment.objects.create(
+                document=url,
+                employee_id=session.employee_id,
+                original_filename=session.original_filename,
+            )
+            session.attachment = attachment
+            session.completed_at = claimed_at
+            session.save(update_fields=["attachment", "completed_at", "updated_at"])
+            session.chunks.all().delete()
+    except Exception:
+        if url is not None:
+            discard_attachments([url], storage)
+        # Hand the session back so the client can retry
+        UploadSession.objects.filter(pk=session.pk, attachment__isnull=True).update(
+            completed_at=None, updated_at=now()
+        )
+        raise
+
+    enqueue("discard_attachments", {"urls": part_urls})
+    return attachment
+
+
+def schedule_upload_expiry(session, last_activity=None):
+    enqueue(
+        "expire_upload_session",
+        {"upload_id": str(session.upload_id)},
+        run_at=(last_activity or session.updated_at) + UPLOAD_SESSION_TTL,
+    )
+
+
+def expire_upload_session(upload_id):
+    """
+    Delete an unfinished upload that has been idle for UPLOAD_SESSION_TTL and
+    discard the parts it left in storage. A session still in use is checked
+    again one TTL after its latest part.
+    """
+    with transaction.atomic():
+        session = (
+            UploadSession.objects.select_for_update()
+            .filter(pk=upload_id, attachment__isnull=True)
+            .first()
+        )
+        if session is None:
+            return
+        latest_chunk = session.chunks.aggregate(latest=Max("received_at"))["latest"]
+        last_activity = max(filter(None, [session.updated_at, latest_chunk]))
+        if last_activity > now() - UPLOAD_SESSION_TTL:
+            schedule_upload_expiry(session, last_activity)
+            return
+        part_urls = list(session.chunks.values_list("part_url", flat=True))
+        session.delete()
+    discard_attachments(part_urls)
@@ -7,6 +7,13 @@ urlpatterns = [
     path("update_employee/<int:pk>/", UpdateEmployeeView.as_view(), name="update_employee"),
     path("get_employee/<int:pk>/", GetEmployeeView.as_view(), name="get_employee"),
     path("list_employees/", ListEmployeesView.as_view(), name="list_employees"),
+    path("export_employees/", ExportEmployeesView.as_view(), name="export_employees"),
+    path("import_employees/", ImportEmployeesView.as_view(), name="import_employees"),
+    path("search_employees/", SearchEmployeesView.as_view(), name="search_employees"),
+    path("employee_stats/", EmployeeStatsView.as_view(), name="employee_stats"),
+    path("changes/", EmployeeChangesView.as_view(), name="employee_changes"),
+    path("history/<int:pk>/", EmployeeHistoryView.as_view(), name="employee_history"),
+    path("bulk_update_employees/", BulkUpdateEmployeesView.as_view(), name="bulk_update_employees"),
     path("delete_employee/<int:pk>/", DeleteEmployeeView.as_view(), name="delete_employee"),
 
     # Contract Type CRUD
@@ -66,6 +73,7 @@ urlpatterns = [
     path("list_custom_fields/", ListCustomFieldsView.as_view(), name="list_custom_fields"),
     path("delete_custom_field/<int:pk>/", DeleteCustomFieldView.as_view(), name="delete_custom_field"),
     path("get_selected_custom_fields/", GetSelectedCustomFieldsView.as_view(), name="get_selected_custom_fields"),
+    path("form_bootstrap/", FormBootstrapView.as_view(), name="form_bootstrap"),
 
     # Employee Custom Field Config
     path("create_employee_custom_field/", CreateEmployeeCustomFieldConfig.as_view(), name="create_employee_custom_field"),
@@ -87,11 +95,26 @@ urlpatterns = [
     path("update_designation/<int:designation_id>/", DesignationUpdateView.as_view(), name="update_designation"),
     path("delete_designation/<int:designation_id>/", DesignationDeleteView.as_view(), name="delete_designation"),   
 
+    # Bulk lookup endpoints: POST creates, PATCH updates, DELETE soft-deletes
+    path("bulk_contract_types/", BulkLookupView.as_view(lookup="contract_types"), name="bulk_contract_types"),
+    path("bulk_job_titles/", BulkLookupView.as_view(lookup="job_titles"), name="bulk_job_titles"),
+    path("bulk_departments/", BulkLookupView.as_view(lookup="departments"), name="bulk_departments"),
+    path("bulk_locations/", BulkLookupView.as_view(lookup="locations"), name="bulk_locations"),
+    path("bulk_banks/", BulkLookupView.as_view(lookup="banks"), name="bulk_banks"),
+    path("bulk_field_types/", BulkLookupView.as_view(lookup="field_types"), name="bulk_field_types"),
+    path("bulk_country_codes/", BulkLookupView.as_view(lookup="country_codes"), name="bulk_country_codes"),
+
     # Attachment Views
     path("upload_attachment/", UploadAttachmentView.as_view(), name="upload_attachment"),
     path("get_attachment/<int:pk>/", GetAttachmentView.as_view(), name="get_attachment"),
     path("list_attachments/", ListAttachmentsView.as_view(), name="list_attachments"),
     path("delete_attachment/<int:pk>/", DeleteAttachmentView.as_view(), name="delete_attachment"),
 
+    # Chunked (resumable) uploads
+    path("start_upload/", StartUploadView.as_view(), name="start_upload"),
+    path("upload_chunk/<uuid:upload_id>/<int:index>/", UploadChunkView.as_view(), name="upload_chunk"),
+    path("upload_status/<uuid:upload_id>/", UploadStatusView.as_view(), name="upload_status"),
+    path("complete_upload/<uuid:upload_id>/", CompleteUploadView.as_view(), name="complete_upload"),
+
 
 ]
\ No newline at end of file
@@ -1,9 +1,15 @@
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 from .models import *
+import os
 import re
 from datetime import datetime
+from django.contrib.auth import get_user_model
 from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Q
+from .uploads import DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE, MAX_UPLOAD_SIZE, MIN_CHUNK_SIZE
+
+User = get_user_model()
 
 def validate_uae_iban(iban):
     """Validate UAE IBAN format and structure"""
@@ -132,13 +138,126 @@ def validate_iban_checksum(iban):
     # Valid IBAN should have remainder = 1
     return remainder == 1
 
-def validate_employee_payload(data):
-    """Validate employee creation/update payload"""
+EMPLOYEE_FK_MODELS = {
+    "phone_country_code": (PhoneCountryCode, "PhoneCountryCode"),
+    "contract_type": (ContractType, "ContractType"),
+    "department": (Department, "Department"),
+    "location": (Locations, "Location"),
+    "bank": (Bank, "Bank"),
+    "job_title": (JobTitle, "JobTitle"),
+}
+
+class LookupResolver:
+    """
+    Request-scoped cache of lookup rows keyed by model and primary key.
+
+    `prime()` collects every FK id referenced by a batch of payloads and loads
+    the missing ones with a single `in_bulk` query per model, so validating
+    one payload or ten thousand costs the same handful of queries.
+    """
+
+    def __init__(self):
+        self._cache = {}
+
+    @staticmethod
+    def _coerce_pk(pk):
+        try:
+            return int(pk)
+        except (TypeError, ValueError):
+            return None
+
+    def prime(self, payloads, fields=EMPLOYEE_FK_MODELS):
+        wanted = {}
+        for data in payloads:
+            for field, (model, _label) in fields.items():
+                pk = self._coerce_pk(data.get(field))
+                if pk is not None and pk not in self._cache.get(model, {}):
+                    wanted.setdefault(model, set()).add(pk)
+
+        for model, pks in wanted.items():
+            found = model.objects.in_bulk(pks)
+            cache = self._cache.setdefault(model, {})
+            for pk in pks:
+                cache[pk] = found.get(pk)
+
+    def get(self, model, pk):
+        pk = self._coerce_pk(pk)
+        if pk is None:
+            return None
+        cache = self._cache.setdefault(model, {})
+        if pk not in cache:
+            cache[pk] = model.objects.filter(pk=pk).first()
+        return cache[pk]
+
+EMPLOYEE_UNIQUE_FIELDS = ["phone_number", "iban", "emirates_id"]
+
+def employee_unique_errors(cleaned_data, errors, instance=None):
+    """
+    Clashes of the cleaned unique fields with other live employees, checked
+    in one query, plus the phone number against existing login usernames.
+    `instance` (the employee being updated) is left out.
+    """
+    unique_errors = {}
+    values = {
+        field: cleaned_data[field] for field in EMPLOYEE_UNIQUE_FIELDS
+        if cleaned_data.get(field) and field not in errors
+    }
+    if not values:
+        return unique_errors
+
+    condition = Q()
+    for field, value in values.items():
+        condition |= Q(**{field: value})
+    taken = Employee.objects.filter(condition)
+    if instance is not None:
+        taken = taken.exclude(pk=instance.pk)
+    for row in taken.values(*values):
+        for field, value in values.items():
+            if row[field] == value:
+                unique_errors[field] = f"{field.replace('_', ' ').capitalize()} already exists."
+
+    # The phone number doubles as the login username
+    phone_number = values.get("phone_number")
+    if phone_number and "phone_number" not in unique_errors:
+        users = User.objects.filter(username=phone_number)
+        if instance is not None and instance.user_id is not None:
+            users = users.exclude(pk=instance.user_id)
+        if users.exists():
+            unique_errors["phone_number"] = "A user with this phone number already exists."
+    return unique_errors
+
+def validate_employee_payloads(payloads, resolver=None):
+    """
+    Validate a batch of employee payloads, resolving their FKs in bulk.
+    Uniqueness is left to the caller, which can check a whole batch at once.
+    """
+    resolver = resolver or LookupResolver()
+    resolver.prime(payloads)
+    return [validate_employee_payload(data, resolver, check_unique=False) for data in payloads]
+
+def validate_employee_payload(data, resolver=None, partial=False, instance=None, check_unique=True):
+    """
+    Validate employee creation/update payload.
+
+    With partial=True only the fields present in `data` are checked, as for
+    PATCH; optional fields sent empty are cleaned to None so they can be
+    cleared. `instance` is the employee being updated, left out of the
+    uniqueness checks.
+    """
     errors = {}
     cleaned_data = {}
 
+    def supplied(field):
+        return not partial or field in data
+
+    if resolver is None:
+        resolver = LookupResolver()
+        resolver.prime([data])
+
     # Required text fields
     for field in ["first_name", "last_name", "phone_number"]:
+        if not supplied(field):
+            continue
         value = data.get(field)
         if not value:
             errors[field] = f"{field.replace('_', ' ').capitalize()} is required."
@@ -147,7 +266,9 @@ def validate_employee_payload(data):
 
     # IBAN validation - Choose between UAE and International validation
     iban = data.get("iban")
-    if not iban:
+    if not supplied("iban"):
+        pass
+    elif not iban:
         errors["iban"] = "IBAN is required."
     else:
         # Option 1: Use UAE IBAN validation (commented out)
@@ -161,17 +282,11 @@ def validate_employee_payload(data):
         else:
             cleaned_data["iban"] = iban
 
-    # PhoneCountryCode (FK)
-    phone_code_id = data.get("phone_country_code")
-    if phone_code_id:
-        try:
-            cleaned_data["phone_country_code"] = PhoneCountryCode.objects.get(id=phone_code_id)
-        except ObjectDoesNotExist:
-            errors["phone_country_code"] = f"PhoneCountryCode with id {phone_code_id} does not exist."
-
     # Payroll Mandatory Fields - Required for payroll inclusion
     payroll_mandatory_fields = ["emirates_id", "labour_card_number", "mohre_establishment_id"]
     for field in payroll_mandatory_fields:
+        if not supplied(field):
+            continue
         value = data.get(field)
         if not value:
             errors[field] = f"{field.replace('_', ' ').capitalize()} is mandatory for payroll inclusion."
@@ -182,6 +297,8 @@ def validate_employee_payload(data):
     passport_number = data.get("passport_number")
     if passport_number:
         cleaned_data["passport_number"] = passport_number
+    elif partial and "passport_number" in data:
+        cleaned_data["passport_number"] = None
 
     # Dates
     for field in ["visa_expiry", "contract_start_date", "contract_end_date"]:
@@ -202,46 +319,20 @@ def validate_employee_payload(data):
                         
             except ValueError:
                 errors[field] = f"{field.replace('_', ' ').capitalize()} must be in YYYY-MM-DD format."
-
-    # ContractType FK
-    contract_type_id = data.get("contract_type")
-    if contract_type_id:
-        try:
-            cleaned_data["contract_type"] = ContractType.objects.get(id=contract_type_id)
-        except ObjectDoesNotExist:
-            errors["contract_type"] = f"ContractType with id {contract_type_id} does not exist."
-
-    # Department FK
-    department_id = data.get("department")
-    if department_id:
-        try:
-            cleaned_data["department"] = Department.objects.get(id=department_id)
-        except ObjectDoesNotExist:
-            errors["department"] = f"Department with id {department_id} does not exist."
-
-    # Location FK
-    location_id = data.get("location")
-    if location_id:
-        try:
-            cleaned_data["location"] = Locations.objects.get(id=location_id)
-        except ObjectDoesNotExist:
-            errors["location"] = f"Location with id {location_id} does not exist."
-
-    # Bank FK
-    bank_id = data.get("bank")
-    if bank_id:
-        try:
-            cleaned_data["bank"] = Bank.objects.get(id=bank_id)
-        except ObjectDoesNotExist:
-            errors["bank"] = f"Bank with id {bank_id} does not exist."
-
-    # Job Title FK
-    job_title_id = data.get("job_title")
-    if job_title_id:
-        try:
-            cleaned_data["job_title"] = JobTitle.objects.get(id=job_title_id)
-        except ObjectDoesNotExist:
-            errors["job_title"] = f"JobTitle with id {job_title_id} does not exist."
+        elif partial and field in data:
+            cleaned_data[field] = None
+
+    # Lookup FKs, resolved through the shared per-request cache
+    for field, (model, label) in EMPLOYEE_FK_MODELS.items():
+        pk = data.get(field)
+        if pk:
+            instance = resolver.get(model, pk)
+            if instance is None:
+                errors[field] = f"{label} with id {pk} does not exist."
+            else:
+                cleaned_data[field] = instance
+        elif partial and field in data:
+            cleaned_data[field] = None
 
     # JSON field: custom_fields
     custom_fields = data.get("custom_fields")
@@ -250,6 +341,17 @@ def validate_employee_payload(data):
             cleaned_data["custom_fields"] = custom_fields
         else:
             errors["custom_fields"] = "custom_fields must be a JSON object."
+    elif partial and "custom_fields" in data:
+        # {} and null both clear the custom fields
+        if isinstance(custom_fields, dict):
+            cleaned_data["custom_fields"] = custom_fields
+        elif custom_fields in (None, ""):
+            cleaned_data["custom_fields"] = None
+        else:
+            errors["custom_fields"] = "custom_fields must be a JSON object."
+
+    if check_unique:
+        errors.update(employee_unique_errors(cleaned_data, errors, instance))
 
     return {
         "is_valid": len(errors) == 0,
@@ -257,7 +359,7 @@ def validate_employee_payload(data):
         "cleaned_data": cleaned_data
     }
 
-def validate_contract_type_payload(data):
+def validate_contract_type_payload(data, check_unique=True):
     """Validate contract type creation/update payload"""
     errors = {}
     cleaned_data = {}
@@ -268,11 +370,8 @@ def validate_contract_type_payload(data):
         errors["contract_type_name"] = "Contract type name is required."
     else:
         # Check uniqueness
-        existing = ContractType.objects.filter(
-            contract_type_name=contract_type_name, 
-            deleted=False
-        )
-        if existing.exists():
+        existing = ContractType.objects.filter(contract_type_name=contract_type_name)
+        if check_unique and existing.exists():
             errors["contract_type_name"] = "Contract type name already exists."
         else:
             cleaned_data["contract_type_name"] = contract_type_name
@@ -283,7 +382,7 @@ def validate_contract_type_payload(data):
         "cleaned_data": cleaned_data
     }
 
-def validate_job_title_payload(data):
+def validate_job_title_payload(data, check_unique=True):
     """Validate job title creation/update payload"""
     errors = {}
     cleaned_data = {}
@@ -294,11 +393,8 @@ def validate_job_title_payload(data):
         errors["job_title_name"] = "Job title name is required."
     else:
         # Check uniqueness
-        existing = JobTitle.objects.filter(
-            job_title_name=job_title_name, 
-            deleted=False
-        )
-        if existing.exists():
+        existing = JobTitle.objects.filter(job_title_name=job_title_name)
+        if check_unique and existing.exists():
             errors["job_title_name"] = "Job title name already exists."
         else:
             cleaned_data["job_title_name"] = job_title_name
@@ -309,7 +405,7 @@ def validate_job_title_payload(data):
         "cleaned_data": cleaned_data
     }
 
-def validate_department_payload(data):
+def validate_department_payload(data, check_unique=True):
     """Validate department creation/update payload"""
     errors = {}
     cleaned_data = {}
@@ -320,11 +416,8 @@ def validate_department_payload(data):
         errors["department_name"] = "Department name is required."
     else:
         # Check uniqueness
-        existing = Department.objects.filter(
-            department_name=department_name, 
-            deleted=False
-        )
-        if existing.exists():
+        existing = Department.objects.filter(department_name=department_name)
+        if check_unique and existing.exists():
             errors["department_name"] = "Department name already exists."
         else:
             cleaned_data["department_name"] = department_name
@@ -335,7 +428,7 @@ def validate_department_payload(data):
         "cleaned_data": cleaned_data
     }
 
-def validate_location_payload(data):
+def validate_location_payload(data, check_unique=True):
     """Validate location creation/update payload"""
     errors = {}
     cleaned_data = {}
@@ -346,11 +439,8 @@ def validate_location_payload(data):
         errors["Location_name"] = "Location name is required."
     else:
         # Check uniqueness
-        existing = Locations.objects.filter(
-            Location_name=location_name, 
-            deleted=False
-        )
-        if existing.exists():
+        existing = Locations.objects.filter(Location_name=location_name)
+        if check_unique and existing.exists():
             errors["Location_name"] = "Location name already exists."
         else:
             cleaned_data["Location_name"] = location_name
@@ -361,7 +451,7 @@ def validate_location_payload(data):
         "cleaned_data": cleaned_data
     }
 
-def validate_bank_payload(data):
+def validate_bank_payload(data, check_unique=True):
     """Validate bank creation/update payload"""
     errors = {}
     cleaned_data = {}
@@ -372,11 +462,8 @@ def validate_bank_payload(data):
         errors["bank_name"] = "Bank name is required."
     else:
         # Check uniqueness
-        existing = Bank.objects.filter(
-            bank_name=bank_name, 
-            deleted=False
-        )
-        if existing.exists():
+        existing = Bank.objects.filter(bank_name=bank_name)
+        if check_unique and existing.exists():
             errors["bank_name"] = "Bank name already exists."
         else:
             cleaned_data["bank_name"] = bank_name
@@ -385,11 +472,8 @@ def validate_bank_payload(data):
     swift_code = data.get("swift_code")
     if swift_code:
         # Check uniqueness
-        existing = Bank.objects.filter(
-            swift_code=swift_code, 
-            deleted=False
-        )
-        if existing.exists():
+        existing = Bank.objects.filter(swift_code=swift_code)
+        if check_unique and existing.exists():
             errors["swift_code"] = "Swift code already exists."
         else:
             cleaned_data["swift_code"] = swift_code
@@ -400,7 +484,7 @@ def validate_bank_payload(data):
         "cleaned_data": cleaned_data
     }
 
-def validate_field_type_payload(data):
+def validate_field_type_payload(data, check_unique=True):
     """Validate field type creation/update payload"""
     errors = {}
     cleaned_data = {}
@@ -411,11 +495,8 @@ def validate_field_type_payload(data):
         errors["field_type_name"] = "Field type name is required."
     else:
         # Check uniqueness
-        existing = FieldType.objects.filter(
-            field_type_name=field_type_name, 
-            deleted=False
-        )
-        if existing.exists():
+        existing = FieldType.objects.filter(field_type_name=field_type_name)
+        if check_unique and existing.exists():
             errors["field_type_name"] = "Field type name already exists."
         else:
             cleaned_data["field_type_name"] = field_type_name
@@ -426,7 +507,7 @@ def validate_field_type_payload(data):
         "cleaned_data": cleaned_data
     }
 
-def validate_country_code_payload(data):
+def validate_country_code_payload(data, check_unique=True):
     """Validate country code creation/update payload"""
     errors = {}
     cleaned_data = {}
@@ -443,11 +524,8 @@ def validate_country_code_payload(data):
         errors["code"] = "Country code is required."
     else:
         # Check uniqueness
-        existing = PhoneCountryCode.objects.filter(
-            code=code, 
-            deleted=False
-        )
-        if existing.exists():
+        existing = PhoneCountryCode.objects.filter(code=code)
+        if check_unique and existing.exists():
             errors["code"] = "Country code already exists."
         else:
             cleaned_data["code"] = code
@@ -469,10 +547,7 @@ def validate_custom_field_payload(data):
         errors["field_key"] = "Field key is required."
     else:
         # Check uniqueness
-        existing = EmployeeCustomFieldConfig.objects.filter(
-            field_key=field_key, 
-            deleted=False
-        )
+        existing = EmployeeCustomFieldConfig.objects.filter(field_key=field_key)
         if existing.exists():
             errors["field_key"] = "Field key already exists."
         else:
@@ -499,8 +574,63 @@ def validate_custom_field_payload(data):
     is_required = data.get("is_required", False)
     cleaned_data["is_required"] = is_required
 
+    is_indexed = data.get("is_indexed", False)
+    if is_indexed and field_key and not re.match(r"^[A-Za-z0-9_]+$", field_key):
+        errors["is_indexed"] = "Only field keys made of letters, digits and underscores can be indexed."
+    else:
+        cleaned_data["is_indexed"] = is_indexed
+
     return {
         "is_valid": len(errors) == 0,
         "errors": errors,
         "cleaned_data": cleaned_data
-    }
\ No newline at end of file
+    }
+
+
+def validate_upload_session_payload(data):
+    """Validate the payload that starts a chunked upload"""
+    errors = {}
+    cleaned_data = {}
+
+    employee_id = data.get("employee_id")
+    if not employee_id:
+        errors["employee_id"] = "Employee ID is required."
+    else:
+        try:
+            cleaned_data["employee"] = Employee.objects.get(employee_id=employee_id)
+        except (ObjectDoesNotExist, ValueError):
+            errors["employee_id"] = f"Employee with id {employee_id} does not exist."
+
+    filename = os.path.basename(str(data.get("filename") or "")).strip()
+    if not filename:
+        errors["filename"] = "Filename is required."
+    elif len(filename) > 200:
+        errors["filename"] = "Filename must be 200 characters or fewer."
+    else:
+        cleaned_data["original_filename"] = filename
+
+    try:
+        total_size = int(data.get("total_size"))
+        if not 0 < total_size <= MAX_UPLOAD_SIZE:
+            errors["total_size"] = f"Total size must be between 1 and {MAX_UPLOAD_SIZE} bytes."
+        else:
+            cleaned_data["total_size"] = total_size
+    except (TypeError, ValueError):
+        errors["total_size"] = "Total size must be an integer number of bytes."
+
+    try:
+        chunk_size = int(data.get("chunk_size") or DEFAULT_CHUNK_SIZE)
+        if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+            errors["chunk_size"] = f"Chunk size must be between {MIN_CHUNK_SIZE} and {MAX_CHUNK_SIZE} bytes."
+        else:
+            cleaned_data["chunk_size"] = chunk_size
+    except (TypeError, ValueError):
+        errors["chunk_size"] = "Chunk size must be an integer number of bytes."
+
+    cleaned_data["content_type"] = data.get("content_type") or None
+
+    return {
+        "is_valid": len(errors) == 0,
+        "errors": errors,
+        "cleaned_data": cleaned_data
+    }
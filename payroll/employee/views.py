@@ -2,17 +2,36 @@ from django.shortcuts import render
 from .models import *
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.db import transaction
+from rest_framework import serializers
+from django.db import IntegrityError, transaction
 from .serializers import *
 from .validators import *
-from datetime import date, timedelta
+from .pagination import InvalidCursor, encode_cursor, paginate_keyset
+from .conditional import CacheValidators, collection_stamp
+from .concurrency import VersionConflict, conflict_response, if_match_version, save_versioned, versioned
+from .cache import cached_lookup
+from .bulk import BulkError, bulk_create_lookups, bulk_delete_lookups, bulk_update_lookups, reassign_employees
+from .search import search_employee_ids
+from .stats import get_employee_stats
+from .custom_fields import FILTER_PREFIX as CUSTOM_FIELD_FILTER_PREFIX, custom_field_filters
+from .importers import EmployeeImporter, ImportFileError, iter_import_rows
+from .accounts import create_employee_user, release_employee_user
+from .storage import discard_attachments, get_attachment_storage, upload_attachments
+from .uploads import UploadStateError, chunk_count, complete_upload, schedule_upload_expiry, store_chunk, upload_progress
+from datetime import date, datetime, timedelta
 from django.shortcuts import get_object_or_404
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
-import uuid
-from payroll.azure_upload import *
-from django.utils.timezone import now
+from django.utils.timezone import now, is_naive, make_aware
+from django.utils.dateparse import parse_datetime
 from rest_framework.parsers import MultiPartParser, FormParser
+from django.http import StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+import csv
+import hashlib
+import json
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 # Create your views here.
 
 ####-Employee-####
@@ -20,6 +39,44 @@ from rest_framework.parsers import MultiPartParser, FormParser
 
 User = get_user_model()
 
+def lookup_list(name, queryset, serializer_class, related=()):
+    """
+    Serialized rows of a lookup table and their collection stamp, from the
+    lookup cache. The entry is rebuilt only after one of the tables it reads
+    changes.
+    """
+    models = [queryset.model] + [queryset.model._meta.get_field(field).related_model for field in related]
+    return cached_lookup(name, models, lambda: {
+        "stamp": collection_stamp(queryset, related=related),
+        "data": serializer_class(queryset, many=True).data,
+    })
+
+def lookup_list_response(request, name, queryset, serializer_class, related=(), paged=True):
+    """
+    Respond with a whole lookup list from the cache, without touching the
+    DB. Requests for a page (`limit` or `cursor`) read the table directly.
+    """
+    if paged and ("limit" in request.query_params or "cursor" in request.query_params):
+        validators = CacheValidators(request, collection_stamp(queryset, related=related))
+        if validators.not_modified is not None:
+            return validators.not_modified
+        try:
+            rows, next_cursor = paginate_keyset(queryset, request, default_limit=None)
+        except InvalidCursor as e:
+            return Response({"error": str(e), "status": 400}, status=400)
+        data = serializer_class(rows, many=True).data
+        return validators.apply(Response({"data": data, "next": next_cursor, "status": 200}, status=200))
+
+    lookup = lookup_list(name, queryset, serializer_class, related)
+    validators = CacheValidators(request, lookup["stamp"])
+    if validators.not_modified is not None:
+        return validators.not_modified
+    body = {"data": lookup["data"]}
+    if paged:
+        body["next"] = None
+    body["status"] = 200
+    return validators.apply(Response(body, status=200))
+
 class CreateEmployeeView(APIView):
     def post(self, request):
         try:
@@ -37,75 +94,70 @@ class CreateEmployeeView(APIView):
 
             cleaned_data = validation_result["cleaned_data"]
 
-            with transaction.atomic():
-                phone = cleaned_data["phone_number"]
-
-                # 1. Create user
-                user = User.objects.create_user(
-                    username=phone,
-                    password=phone,
-                    is_active=True
-                )
-
-                # 2. Create employee record
-                employee = Employee.objects.create(
-                    user=user,
-                    first_name=cleaned_data["first_name"],
-                    last_name=cleaned_data["last_name"],
-                    phone_number=cleaned_data["phone_number"],
-                    phone_country_code=cleaned_data.get("phone_country_code"),
-                    emirates_id=cleaned_data.get("emirates_id"),
-                    passport_number=cleaned_data.get("passport_number"),
-                    labour_card_number=cleaned_data.get("labour_card_number"),
-                    visa_expiry=cleaned_data.get("visa_expiry"),
-                    contract_type=cleaned_data.get("contract_type"),
-                    contract_start_date=cleaned_data.get("contract_start_date"),
-                    contract_end_date=cleaned_data.get("contract_end_date"),
-                    department=cleaned_data.get("department"),
-                    location=cleaned_data.get("location"),
-                    bank=cleaned_data.get("bank"),
-                    mohre_establishment_id=cleaned_data.get("mohre_establishment_id"),
-                    job_title=cleaned_data.get("job_title"),
-                    iban=cleaned_data["iban"],
-                    custom_fields=cleaned_data.get("custom_fields", {})
-                )
-                saved_attachments = []
-                for file_input in files:
-                    file_prefix = str(uuid.uuid4())
-                    azure_url = upload_file_to_azure(file_input, folder_name="attachments", prefix=file_prefix)
-
-                    if not azure_url:
-                        raise Exception(f"File upload failed for {file_input.name}")
-
-                    Attachment.objects.create(
-                        document=azure_url,
-                        employee=employee,
-                        original_filename=file_input.name
-                    )
-
-                    saved_attachments.append({
-                        "file_name": file_input.name,
-                        "azure_url": azure_url
-                    })
+            # Upload before opening the transaction so it only spans the inserts
+            urls = upload_attachments(files)
+            try:
+                self.create_employee(cleaned_data, files, urls)
+            except Exception:
+                discard_attachments(urls)
+                raise
 
-                return Response({
-                    "message": "Employee created successfully",
-                    "status": 201,
-                    "attachments": saved_attachments
-                })
+            return Response({
+                "message": "Employee created successfully",
+                "status": 201,
+                "attachments": [
+                    {"file_name": file_input.name, "azure_url": url}
+                    for file_input, url in zip(files, urls)
+                ]
+            })
 
         except ValidationError as e:
             return Response({"error": str(e), "status": 400})
         except Exception as e:
             return Response({"error": str(e), "status": 500})
 
+    def create_employee(self, cleaned_data, files, urls):
+        with transaction.atomic():
+            phone = cleaned_data["phone_number"]
+
+            # 1. Create user
+            user = create_employee_user(phone)
+
+            # 2. Create employee record
+            employee = Employee.objects.create(
+                user=user,
+                first_name=cleaned_data["first_name"],
+                last_name=cleaned_data["last_name"],
+                phone_number=cleaned_data["phone_number"],
+                phone_country_code=cleaned_data.get("phone_country_code"),
+                emirates_id=cleaned_data.get("emirates_id"),
+                passport_number=cleaned_data.get("passport_number"),
+                labour_card_number=cleaned_data.get("labour_card_number"),
+                visa_expiry=cleaned_data.get("visa_expiry"),
+                contract_type=cleaned_data.get("contract_type"),
+                contract_start_date=cleaned_data.get("contract_start_date"),
+                contract_end_date=cleaned_data.get("contract_end_date"),
+                department=cleaned_data.get("department"),
+                location=cleaned_data.get("location"),
+                bank=cleaned_data.get("bank"),
+                mohre_establishment_id=cleaned_data.get("mohre_establishment_id"),
+                job_title=cleaned_data.get("job_title"),
+                iban=cleaned_data["iban"],
+                custom_fields=cleaned_data.get("custom_fields", {})
+            )
+            Attachment.objects.bulk_create([
+                Attachment(document=url, employee=employee, original_filename=file_input.name)
+                for file_input, url in zip(files, urls)
+            ])
+            return employee
+
 class UpdateEmployeeView(APIView):
     def put(self, request, pk):
         try:
-            employee = Employee.objects.get(employee_id=pk, deleted=False)
+            employee = Employee.objects.get(employee_id=pk)
             data = request.data
 
-            validation_result = validate_employee_payload(data)
+            validation_result = validate_employee_payload(data, instance=employee)
 
             if not validation_result["is_valid"]:
                 return Response({
@@ -120,36 +172,375 @@ class UpdateEmployeeView(APIView):
                 if hasattr(employee, field):
                     setattr(employee, field, value)
             
-            employee.save()
-            return Response({"message": "Employee updated successfully.", "status": 200})
+            save_versioned(employee, if_match_version(request))
+            return versioned(Response({"message": "Employee updated successfully.", "status": 200}), employee)
             
+        except VersionConflict as e:
+            return conflict_response(e)
         except Employee.DoesNotExist:
             return Response({"error": "Employee not found", "status": 404})
         except Exception as e:
             return Response({"error": str(e), "status": 500})
 
+    def patch(self, request, pk):
+        """Validate only the supplied fields and write only the ones that changed"""
+        try:
+            employee = Employee.objects.get(employee_id=pk)
+        except Employee.DoesNotExist:
+            return Response({"error": "Employee not found", "status": 404}, status=404)
+
+        validation_result = validate_employee_payload(request.data, partial=True, instance=employee)
+        if not validation_result["is_valid"]:
+            return Response({"status": 400, "errors": validation_result["errors"]}, status=400)
+
+        expected_version = if_match_version(request)
+        changed = changed_employee_fields(employee, validation_result["cleaned_data"])
+        if not changed and expected_version in (None, employee.version):
+            return versioned(Response({"message": "No changes.", "updated_fields": [], "status": 200}, status=200), employee)
+
+        try:
+            with transaction.atomic():
+                save_versioned(employee, expected_version, update_fields=changed)
+        except VersionConflict as e:
+            return conflict_response(e)
+        except IntegrityError as e:
+            # Lost a race with another write of the same unique value
+            return Response({"status": 400, "error": str(e)}, status=400)
+        return versioned(Response({"message": "Employee updated successfully.", "updated_fields": changed, "status": 200}, status=200), employee)
+
+def changed_employee_fields(employee, cleaned_data):
+    """Apply `cleaned_data` to `employee` and return the names of the fields whose value changed"""
+    changed = []
+    for name, value in cleaned_data.items():
+        field = employee._meta.get_field(name)
+        if field.is_relation:
+            # Compare ids so the current related rows are never fetched
+            current, new = getattr(employee, field.attname), getattr(value, "pk", None)
+        else:
+            current, new = getattr(employee, name), value
+        if current != new:
+            setattr(employee, name, value)
+            changed.append(name)
+    return changed
+
 class GetEmployeeView(APIView):
     def get(self, request, pk):
         try:
-            employee = Employee.objects.get(employee_id=pk, deleted=False)
-            serializer = EmployeeSerializer(employee)
-            return Response({"data": serializer.data, "status": 200})
+            fields = EmployeeReadSerializer.parse_fields(request.query_params.get("fields"))
+            employees = Employee.objects.filter(employee_id=pk)
+            stamp = collection_stamp(employees, related=EmployeeReadSerializer.related_for(fields), versioned=True)
+            if not stamp["count"]:
+                raise Employee.DoesNotExist
+            validators = CacheValidators(request, stamp)
+            if validators.not_modified is not None:
+                return validators.not_modified
+
+            employee = EmployeeReadSerializer.setup_eager_loading(employees, fields).get()
+            serializer = EmployeeReadSerializer(employee, fields=fields)
+            return validators.apply(Response({"data": serializer.data, "status": 200}, status=200))
+        except serializers.ValidationError as e:
+            return Response({"error": e.detail, "status": 400}, status=400)
         except Employee.DoesNotExist:
-            return Response({"error": "Employee not found", "status": 404})
+            return Response({"error": "Employee not found", "status": 404}, status=404)
+
+EMPLOYEE_FK_FILTERS = ["department", "location", "contract_type", "job_title", "bank", "designation"]
+EMPLOYEE_DATE_FILTERS = ["visa_expiry", "contract_start_date", "contract_end_date"]
+EMPLOYEE_FILTER_PARAMS = set(EMPLOYEE_FK_FILTERS) | {
+    f"{field}_{suffix}" for field in EMPLOYEE_DATE_FILTERS for suffix in ("from", "to")
+}
+
+def filter_employees(queryset, params):
+    """
+    Apply the employee list filters shared by the list and export views.
+
+    FK filters take an id or a comma separated list of ids, e.g.
+    `department=3` or `location=1,2`. Date filters take `<field>_from` and
+    `<field>_to` bounds in YYYY-MM-DD format, both inclusive. Indexed custom
+    fields are matched with `cf.<field_key>=value`.
+    """
+    errors = {}
+    filters = {}
+
+    for field in EMPLOYEE_FK_FILTERS:
+        value = params.get(field)
+        if not value:
+            continue
+        try:
+            ids = [int(pk) for pk in value.split(",")]
+        except ValueError:
+            errors[field] = f"{field} must be an id or a comma separated list of ids."
+            continue
+        if len(ids) == 1:
+            filters[f"{field}_id"] = ids[0]
+        else:
+            filters[f"{field}_id__in"] = ids
+
+    for field in EMPLOYEE_DATE_FILTERS:
+        for suffix, lookup in (("from", "gte"), ("to", "lte")):
+            param = f"{field}_{suffix}"
+            value = params.get(param)
+            if not value:
+                continue
+            try:
+                filters[f"{field}__{lookup}"] = datetime.strptime(value, "%Y-%m-%d").date()
+            except ValueError:
+                errors[param] = f"{param} must be in YYYY-MM-DD format."
+
+    queryset, custom_field_errors = custom_field_filters(queryset.filter(**filters), params)
+    errors.update(custom_field_errors)
+
+    if errors:
+        raise serializers.ValidationError(errors)
+    return queryset
 
 class ListEmployeesView(APIView):
     def get(self, request):
-        employees = Employee.objects.filter(deleted=False)
-        serializer = EmployeeSerializer(employees, many=True)
-        return Response({"data": serializer.data, "status": 200})
+        try:
+            fields = EmployeeReadSerializer.parse_fields(request.query_params.get("fields"))
+            employees = filter_employees(Employee.objects.all(), request.query_params)
+        except serializers.ValidationError as e:
+            return Response({"error": e.detail, "status": 400}, status=400)
+
+        validators = CacheValidators(
+            request, collection_stamp(employees, related=EmployeeReadSerializer.related_for(fields))
+        )
+        if validators.not_modified is not None:
+            return validators.not_modified
+
+        employees = EmployeeReadSerializer.setup_eager_loading(employees, fields)
+        try:
+            employees, next_cursor = paginate_keyset(employees, request, keys=("employee_id",))
+        except InvalidCursor as e:
+            return Response({"error": str(e), "status": 400}, status=400)
+        serializer = EmployeeReadSerializer(employees, many=True, fields=fields)
+        return validators.apply(Response({"data": serializer.data, "next": next_cursor, "status": 200}, status=200))
+
+class SearchEmployeesView(APIView):
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT = 100
+
+    def get(self, request):
+        query = request.query_params.get("q", "")
+        if not query.strip():
+            return Response({"error": "q is required.", "status": 400}, status=400)
+        try:
+            limit = min(int(request.query_params.get("limit", self.DEFAULT_LIMIT)), self.MAX_LIMIT)
+        except ValueError:
+            return Response({"error": "limit must be an integer.", "status": 400}, status=400)
+
+        ids = search_employee_ids(query, max(limit, 1))
+        employees = EmployeeReadSerializer.setup_eager_loading(Employee.objects.all()).in_bulk(ids)
+        ranked = [employees[pk] for pk in ids if pk in employees]
+        serializer = EmployeeReadSerializer(ranked, many=True)
+        return Response({"data": serializer.data, "count": len(ranked), "status": 200}, status=200)
+
+class EmployeeStatsView(APIView):
+    def get(self, request):
+        return Response({"data": get_employee_stats(), "status": 200}, status=200)
+
+class EmployeeChangesView(APIView):
+    """
+    Employees created, updated or soft-deleted after a watermark.
+
+    Pages are ordered by (updated_at, employee_id) so rows sharing a timestamp
+    are never skipped. Pass `since` (ISO datetime) on the first call, then the
+    returned `next` cursor while more pages remain. On the last page `next` is
+    null and `watermark` is the cursor to resume from on the next sync.
+    """
+    CHANGES_PAGE_SIZE = 500
+
+    def get(self, request):
+        changes = Employee.all_objects.all()
+
+        since_value = None
+        since = request.query_params.get("since")
+        if since and not request.query_params.get("cursor"):
+            since_value = parse_datetime(since)
+            if since_value is None:
+                return Response({"error": "since must be an ISO 8601 datetime.", "status": 400}, status=400)
+            if is_naive(since_value):
+                since_value = make_aware(since_value)
+            changes = changes.filter(updated_at__gt=since_value)
+
+        keys = ("updated_at", "employee_id")
+        try:
+            page, next_cursor = paginate_keyset(
+                EmployeeReadSerializer.setup_eager_loading(changes), request,
+                keys=keys, default_limit=self.CHANGES_PAGE_SIZE
+            )
+        except InvalidCursor as e:
+            return Response({"error": str(e), "status": 400}, status=400)
+
+        data = []
+        for employee in page:
+            if employee.deleted:
+                data.append({
+                    "employee_id": employee.employee_id,
+                    "deleted": True,
+                    "updated_at": employee.updated_at,
+                })
+            else:
+                data.append(EmployeeReadSerializer(employee).data)
+
+        if page:
+            watermark = encode_cursor([page[-1].updated_at, page[-1].employee_id])
+        elif request.query_params.get("cursor"):
+            watermark = request.query_params.get("cursor")
+        elif since_value is not None:
+            # Nothing changed yet; resume from `since` rather than the start
+            watermark = encode_cursor([since_value, 0])
+        else:
+            watermark = None
+
+        return Response({
+            "data": data,
+            "next": next_cursor,
+            "watermark": watermark,
+            "status": 200
+        }, status=200)
+
+class BulkUpdateEmployeesView(APIView):
+    """
+    Move many employees at once, e.g. {"ids": [1, 2], "set": {"department": 4}}
+    or {"filter": {"location": 2}, "set": {"location": 3}}. The filter takes
+    the same parameters as list_employees/.
+    """
+    def post(self, request):
+        ids = request.data.get("ids")
+        filters = request.data.get("filter")
+        if bool(ids) == bool(filters):
+            return Response({"status": 400, "error": "Pass either ids or filter."}, status=400)
+
+        employees = Employee.objects.all()
+        try:
+            if ids:
+                if not isinstance(ids, list):
+                    raise serializers.ValidationError({"ids": "ids must be a list of employee ids."})
+                employees = employees.filter(employee_id__in=[int(pk) for pk in ids])
+            else:
+                if not isinstance(filters, dict):
+                    raise serializers.ValidationError({"filter": "filter must be an object."})
+                # list_employees/ skips what it does not know; here that would
+                # quietly widen the update to every employee
+                errors = {}
+                for key, value in filters.items():
+                    if key not in EMPLOYEE_FILTER_PARAMS and not key.startswith(CUSTOM_FIELD_FILTER_PREFIX):
+                        errors[key] = f"{key} is not an employee filter."
+                    elif value in (None, "", []):
+                        errors[key] = f"{key} must not be empty."
+                if errors:
+                    raise serializers.ValidationError({"filter": errors})
+                params = {
+                    key: ",".join(map(str, value)) if isinstance(value, list) else str(value)
+                    for key, value in filters.items()
+                }
+                employees = filter_employees(employees, params)
+            updated = reassign_employees(employees, request.data.get("set"))
+        except (TypeError, ValueError):
+            return Response({"status": 400, "errors": {"ids": "ids must be a list of employee ids."}}, status=400)
+        except serializers.ValidationError as e:
+            return Response({"status": 400, "errors": e.detail}, status=400)
+        except BulkError as e:
+            return Response({"status": 400, "errors": e.errors}, status=400)
+
+        return Response({"updated": updated, "status": 200}, status=200)
+
+class EmployeeHistoryView(APIView):
+    """Change history of one employee, oldest first, paged with `limit` and `cursor`"""
+    def get(self, request, pk):
+        history = EmployeeHistory.objects.filter(employee_id=pk).select_related("changed_by")
+        try:
+            page, next_cursor = paginate_keyset(history, request, keys=("changed_at", "id"))
+        except InvalidCursor as e:
+            return Response({"error": str(e), "status": 400}, status=400)
+
+        return Response({
+            "data": EmployeeHistorySerializer(page, many=True).data,
+            "next": next_cursor,
+            "status": 200
+        }, status=200)
+
+class ImportEmployeesView(APIView):
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        uploaded_file = request.FILES.get("file")
+        if not uploaded_file:
+            return Response({"error": "file is required.", "status": 400}, status=400)
+
+        importer = EmployeeImporter()
+        try:
+            report = importer.run(iter_import_rows(uploaded_file))
+        except ImportFileError as e:
+            # Batches read before a bad part of the file stay imported
+            return Response({"error": str(e), "created": importer.created, "status": 400}, status=400)
+        except Exception as e:
+            return Response({"error": str(e), "status": 500}, status=500)
+
+        return Response({**report, "status": 200}, status=200)
+
+class EchoBuffer:
+    """File-like object that hands back whatever csv.writer writes to it"""
+    def write(self, value):
+        return value
+
+class ExportEmployeesView(APIView):
+    EXPORT_CHUNK_SIZE = 2000
+
+    def get(self, request):
+        export_format = request.query_params.get("export_format", "ndjson")
+        if export_format not in ("ndjson", "csv"):
+            return Response({"error": "export_format must be 'ndjson' or 'csv'.", "status": 400}, status=400)
+
+        try:
+            employees = filter_employees(Employee.objects.all(), request.query_params)
+        except serializers.ValidationError as e:
+            return Response({"error": e.detail, "status": 400}, status=400)
+
+        field_names = list(EmployeeSerializer().fields)
+        rows = (
+            employees
+            .order_by("employee_id")
+            .values(*field_names)
+            .iterator(chunk_size=self.EXPORT_CHUNK_SIZE)
+        )
+
+        if export_format == "csv":
+            content = self.stream_csv(rows, field_names)
+            content_type = "text/csv"
+        else:
+            content = self.stream_ndjson(rows)
+            content_type = "application/x-ndjson"
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="employees.{export_format}"'
+        return response
+
+    @staticmethod
+    def stream_ndjson(rows):
+        for row in rows:
+            yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+    @staticmethod
+    def stream_csv(rows, field_names):
+        writer = csv.writer(EchoBuffer())
+        yield writer.writerow(field_names)
+        for row in rows:
+            if row.get("custom_fields") is not None:
+                row["custom_fields"] = json.dumps(row["custom_fields"], cls=DjangoJSONEncoder)
+            yield writer.writerow([row[name] for name in field_names])
 
 class DeleteEmployeeView(APIView):
     def delete(self, request, pk):
         try:
-            employee = Employee.objects.get(employee_id=pk, deleted=False)
-            employee.deleted = True
-            employee.save()
+            employee = Employee.objects.get(employee_id=pk)
+            with transaction.atomic():
+                employee.deleted = True
+                save_versioned(employee, if_match_version(request), update_fields=["deleted"])
+                release_employee_user(employee)
             return Response({"message": "Employee deleted successfully.", "status": 200})
+        except VersionConflict as e:
+            return conflict_response(e)
         except Employee.DoesNotExist:
             return Response({"error": "Employee not found", "status": 404})
         except Exception as e:
@@ -187,7 +578,7 @@ class CreateContractType(APIView):
 class UpdateContractType(APIView):
     def put(self, request, pk):
         try:
-            contract_type = ContractType.objects.get(contract_type_id=pk, deleted=False)
+            contract_type = ContractType.objects.get(contract_type_id=pk)
             data = request.data
             
             # Validate payload
@@ -206,12 +597,14 @@ class UpdateContractType(APIView):
                 if hasattr(contract_type, field):
                     setattr(contract_type, field, value)
             
-            contract_type.save()
-            return Response({
+            save_versioned(contract_type, if_match_version(request))
+            return versioned(Response({
                 "message": "Contract type updated successfully.",
                 "status": 200
-            })
+            }), contract_type)
             
+        except VersionConflict as e:
+            return conflict_response(e)
         except ContractType.DoesNotExist:
             return Response({"error": "Contract type not found", "status": 404})
         except Exception as e:
@@ -220,25 +613,26 @@ class UpdateContractType(APIView):
 class GetContractType(APIView):
     def get(self, request, pk):
         try:
-            contract_type = ContractType.objects.get(contract_type_id=pk, deleted=False)
+            contract_type = ContractType.objects.get(contract_type_id=pk)
             serializer = ContractTypeSerializer(contract_type)
-            return Response({"data": serializer.data, "status": 200})
+            return versioned(Response({"data": serializer.data, "status": 200}), contract_type)
         except ContractType.DoesNotExist:
             return Response({"error": "Contract type not found", "status": 404})
 
 class ListContractTypes(APIView):
     def get(self, request):
-        contract_types = ContractType.objects.filter(deleted=False)
-        serializer = ContractTypeSerializer(contract_types, many=True)
-        return Response({"data": serializer.data, "status": 200})
+        contract_types = ContractType.objects.all()
+        return lookup_list_response(request, "contract_types", contract_types, ContractTypeSerializer)
 
 class DeleteContractType(APIView):
     def delete(self, request, pk):
         try:
-            contract_type = ContractType.objects.get(contract_type_id=pk, deleted=False)
+            contract_type = ContractType.objects.get(contract_type_id=pk)
             contract_type.deleted = True
-            contract_type.save()
+            save_versioned(contract_type, if_match_version(request), update_fields=["deleted"])
             return Response({"message": "Contract type deleted successfully.", "status": 200})
+        except VersionConflict as e:
+            return conflict_response(e)
         except ContractType.DoesNotExist:
             return Response({"error": "Contract type not found", "status": 404})
         except Exception as e:
@@ -276,7 +670,7 @@ class CreateJobTitle(APIView):
 class UpdateJobTitle(APIView):
     def put(self, request, pk):
         try:
-            job_title = JobTitle.objects.get(job_title_id=pk, deleted=False)
+            job_title = JobTitle.objects.get(job_title_id=pk)
             data = request.data
             
             # Validate payload
@@ -295,12 +689,14 @@ class UpdateJobTitle(APIView):
                 if hasattr(job_title, field):
                     setattr(job_title, field, value)
             
-            job_title.save()
-            return Response({
+            save_versioned(job_title, if_match_version(request))
+            return versioned(Response({
                 "message": "Job title updated successfully.",
                 "status": 200
-            })
+            }), job_title)
             
+        except VersionConflict as e:
+            return conflict_response(e)
         except JobTitle.DoesNotExist:
             return Response({"error": "Job title not found", "status": 404})
         except Exception as e:
@@ -309,25 +705,26 @@ class UpdateJobTitle(APIView):
 class GetJobTitle(APIView):
     def get(self, request, pk):
         try:
-            job_title = JobTitle.objects.get(job_title_id=pk, deleted=False)
+            job_title = JobTitle.objects.get(job_title_id=pk)
             serializer = JobTitleSerializer(job_title)
-            return Response({"data": serializer.data, "status": 200})
+            return versioned(Response({"data": serializer.data, "status": 200}), job_title)
         except JobTitle.DoesNotExist:
             return Response({"error": "Job title not found", "status": 404})
 
 class ListJobTitles(APIView):
     def get(self, request):
-        job_titles = JobTitle.objects.filter(deleted=False)
-        serializer = JobTitleSerializer(job_titles, many=True)
-        return Response({"data": serializer.data, "status": 200})
+        job_titles = JobTitle.objects.all()
+        return lookup_list_response(request, "job_titles", job_titles, JobTitleSerializer)
 
 class DeleteJobTitle(APIView):
     def delete(self, request, pk):
         try:
-            job_title = JobTitle.objects.get(job_title_id=pk, deleted=False)
+            job_title = JobTitle.objects.get(job_title_id=pk)
             job_title.deleted = True
-            job_title.save()
+            save_versioned(job_title, if_match_version(request), update_fields=["deleted"])
             return Response({"message": "Job title deleted successfully.", "status": 200})
+        except VersionConflict as e:
+            return conflict_response(e)
         except JobTitle.DoesNotExist:
             return Response({"error": "Job title not found", "status": 404})
         except Exception as e:
@@ -365,7 +762,7 @@ class CreateDepartment(APIView):
 class UpdateDepartment(APIView):
     def put(self, request, pk):
         try:
-            department = Department.objects.get(department_id=pk, deleted=False)
+            department = Department.objects.get(department_id=pk)
             data = request.data
             
             # Validate payload
@@ -384,12 +781,14 @@ class UpdateDepartment(APIView):
                 if hasattr(department, field):
                     setattr(department, field, value)
             
-            department.save()
-            return Response({
+            save_versioned(department, if_match_version(request))
+            return versioned(Response({
                 "message": "Department updated successfully.",
                 "status": 200
-            })
+            }), department)
             
+        except VersionConflict as e:
+            return conflict_response(e)
         except Department.DoesNotExist:
             return Response({"error": "Department not found", "status": 404})
         except Exception as e:
@@ -398,25 +797,26 @@ class UpdateDepartment(APIView):
 class GetDepartment(APIView):
     def get(self, request, pk):
         try:
-            department = Department.objects.get(department_id=pk, deleted=False)
+            department = Department.objects.get(department_id=pk)
             serializer = DepartmentSerializer(department)
-            return Response({"data": serializer.data, "status": 200})
+            return versioned(Response({"data": serializer.data, "status": 200}), department)
         except Department.DoesNotExist:
             return Response({"error": "Department not found", "status": 404})
 
 class ListDepartments(APIView):
     def get(self, request):
-        departments = Department.objects.filter(deleted=False)
-        serializer = DepartmentSerializer(departments, many=True)
-        return Response({"data": serializer.data, "status": 200})
+        departments = Department.objects.all()
+        return lookup_list_response(request, "departments", departments, DepartmentSerializer)
 
 class DeleteDepartment(APIView):
     def delete(self, request, pk):
         try:
-            department = Department.objects.get(department_id=pk, deleted=False)
+            department = Department.objects.get(department_id=pk)
             department.deleted = True
-            department.save()
+            save_versioned(department, if_match_version(request), update_fields=["deleted"])
             return Response({"message": "Department deleted successfully.", "status": 200})
+        except VersionConflict as e:
+            return conflict_response(e)
         except Department.DoesNotExist:
             return Response({"error": "Department not found", "status": 404})
         except Exception as e:
@@ -465,30 +865,37 @@ class DesignationCreateView(APIView):
 
 class DesignationListView(APIView):
     def get(self, request):
-        designations = Designation.objects.filter(deleted=False)
-        serializer = DesignationSerializer(designations, many=True)
-        return Response({"data": serializer.data, "status": 200})
+        designations = Designation.objects.all()
+        return lookup_list_response(request, "designations", designations, DesignationSerializer)
 
 class DesignationDetailView(APIView):
     def get(self, request, designation_id):
-        designation = get_object_or_404(Designation, id=designation_id, deleted=False)
+        designation = get_object_or_404(Designation, id=designation_id)
         serializer = DesignationSerializer(designation)
-        return Response({"data": serializer.data, "status": 200})
+        return versioned(Response({"data": serializer.data, "status": 200}), designation)
 
 class DesignationUpdateView(APIView):
     def put(self, request, designation_id):
-        designation = get_object_or_404(Designation, id=designation_id, deleted=False)
+        designation = get_object_or_404(Designation, id=designation_id)
         serializer = DesignationSerializer(designation, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
-            return Response({"message": "Designation updated successfully.", "status": 200})
+            for field, value in serializer.validated_data.items():
+                setattr(designation, field, value)
+            try:
+                save_versioned(designation, if_match_version(request))
+            except VersionConflict as e:
+                return conflict_response(e)
+            return versioned(Response({"message": "Designation updated successfully.", "status": 200}), designation)
         return Response({"error": serializer.errors, "status": 400})
 
 class DesignationDeleteView(APIView):
     def delete(self, request, designation_id):
-        designation = get_object_or_404(Designation, id=designation_id, deleted=False)
+        designation = get_object_or_404(Designation, id=designation_id)
         designation.deleted = True
-        designation.save()
+        try:
+            save_versioned(designation, if_match_version(request), update_fields=["deleted"])
+        except VersionConflict as e:
+            return conflict_response(e)
         return Response({"message": "Designation soft-deleted successfully.", "status": 204})
 
 # Location Views
@@ -523,7 +930,7 @@ class CreateLocation(APIView):
 class UpdateLocation(APIView):
     def put(self, request, pk):
         try:
-            location = Locations.objects.get(Location_id=pk, deleted=False)
+            location = Locations.objects.get(Location_id=pk)
             data = request.data
             
             # Validate payload
@@ -542,12 +949,14 @@ class UpdateLocation(APIView):
                 if hasattr(location, field):
                     setattr(location, field, value)
             
-            location.save()
-            return Response({
+            save_versioned(location, if_match_version(request))
+            return versioned(Response({
                 "message": "Location updated successfully.",
                 "status": 200
-            })
+            }), location)
             
+        except VersionConflict as e:
+            return conflict_response(e)
         except Locations.DoesNotExist:
             return Response({"error": "Location not found", "status": 404})
         except Exception as e:
@@ -556,25 +965,26 @@ class UpdateLocation(APIView):
 class GetLocation(APIView):
     def get(self, request, pk):
         try:
-            location = Locations.objects.get(Location_id=pk, deleted=False)
+            location = Locations.objects.get(Location_id=pk)
             serializer = LocationsSerializer(location)
-            return Response({"data": serializer.data, "status": 200})
+            return versioned(Response({"data": serializer.data, "status": 200}), location)
         except Locations.DoesNotExist:
             return Response({"error": "Location not found", "status": 404})
 
 class ListLocations(APIView):
     def get(self, request):
-        locations = Locations.objects.filter(deleted=False)
-        serializer = LocationsSerializer(locations, many=True)
-        return Response({"data": serializer.data, "status": 200})
+        locations = Locations.objects.all()
+        return lookup_list_response(request, "locations", locations, LocationsSerializer)
 
 class DeleteLocation(APIView):
     def delete(self, request, pk):
         try:
-            location = Locations.objects.get(Location_id=pk, deleted=False)
+            location = Locations.objects.get(Location_id=pk)
             location.deleted = True
-            location.save()
+            save_versioned(location, if_match_version(request), update_fields=["deleted"])
             return Response({"message": "Location deleted successfully.", "status": 200})
+        except VersionConflict as e:
+            return conflict_response(e)
         except Locations.DoesNotExist:
             return Response({"error": "Location not found", "status": 404})
         except Exception as e:
@@ -613,7 +1023,7 @@ class CreateBank(APIView):
 class UpdateBank(APIView):
     def put(self, request, pk):
         try:
-            bank = Bank.objects.get(bank_id=pk, deleted=False)
+            bank = Bank.objects.get(bank_id=pk)
             data = request.data
             
             # Validate payload
@@ -632,12 +1042,14 @@ class UpdateBank(APIView):
                 if hasattr(bank, field):
                     setattr(bank, field, value)
             
-            bank.save()
-            return Response({
+            save_versioned(bank, if_match_version(request))
+            return versioned(Response({
                 "message": "Bank updated successfully.",
                 "status": 200
-            })
+            }), bank)
             
+        except VersionConflict as e:
+            return conflict_response(e)
         except Bank.DoesNotExist:
             return Response({"error": "Bank not found", "status": 404})
         except Exception as e:
@@ -646,25 +1058,26 @@ class UpdateBank(APIView):
 class GetBank(APIView):
     def get(self, request, pk):
         try:
-            bank = Bank.objects.get(bank_id=pk, deleted=False)
+            bank = Bank.objects.get(bank_id=pk)
             serializer = BankSerializer(bank)
-            return Response({"data": serializer.data, "status": 200})
+            return versioned(Response({"data": serializer.data, "status": 200}), bank)
         except Bank.DoesNotExist:
             return Response({"error": "Bank not found", "status": 404})
 
 class ListBanks(APIView):
     def get(self, request):
-        banks = Bank.objects.filter(deleted=False)
-        serializer = BankSerializer(banks, many=True)
-        return Response({"data": serializer.data, "status": 200})
+        banks = Bank.objects.all()
+        return lookup_list_response(request, "banks", banks, BankSerializer)
 
 class DeleteBank(APIView):
     def delete(self, request, pk):
         try:
-            bank = Bank.objects.get(bank_id=pk, deleted=False)
+            bank = Bank.objects.get(bank_id=pk)
             bank.deleted = True
-            bank.save()
+            save_versioned(bank, if_match_version(request), update_fields=["deleted"])
             return Response({"message": "Bank deleted successfully.", "status": 200})
+        except VersionConflict as e:
+            return conflict_response(e)
         except Bank.DoesNotExist:
             return Response({"error": "Bank not found", "status": 404})
         except Exception as e:
@@ -702,7 +1115,7 @@ class CreateFieldType(APIView):
 class UpdateFieldType(APIView):
     def put(self, request, pk):
         try:
-            field_type = FieldType.objects.get(field_type_id=pk, deleted=False)
+            field_type = FieldType.objects.get(field_type_id=pk)
             data = request.data
             
             # Validate payload
@@ -721,12 +1134,14 @@ class UpdateFieldType(APIView):
                 if hasattr(field_type, field):
                     setattr(field_type, field, value)
             
-            field_type.save()
-            return Response({
+            save_versioned(field_type, if_match_version(request))
+            return versioned(Response({
                 "message": "Field type updated successfully.",
                 "status": 200
-            })
+            }), field_type)
             
+        except VersionConflict as e:
+            return conflict_response(e)
         except FieldType.DoesNotExist:
             return Response({"error": "Field type not found", "status": 404})
         except Exception as e:
@@ -735,25 +1150,26 @@ class UpdateFieldType(APIView):
 class GetFieldType(APIView):
     def get(self, request, pk):
         try:
-            field_type = FieldType.objects.get(field_type_id=pk, deleted=False)
+            field_type = FieldType.objects.get(field_type_id=pk)
             serializer = FieldTypeSerializer(field_type)
-            return Response({"data": serializer.data, "status": 200})
+            return versioned(Response({"data": serializer.data, "status": 200}), field_type)
         except FieldType.DoesNotExist:
             return Response({"error": "Field type not found", "status": 404})
 
 class ListFieldTypes(APIView):
     def get(self, request):
-        field_types = FieldType.objects.filter(deleted=False)
-        serializer = FieldTypeSerializer(field_types, many=True)
-        return Response({"data": serializer.data, "status": 200})
+        field_types = FieldType.objects.all()
+        return lookup_list_response(request, "field_types", field_types, FieldTypeSerializer)
 
 class DeleteFieldType(APIView):
     def delete(self, request, pk):
         try:
-            field_type = FieldType.objects.get(field_type_id=pk, deleted=False)
+            field_type = FieldType.objects.get(field_type_id=pk)
             field_type.deleted = True
-            field_type.save()
+            save_versioned(field_type, if_match_version(request), update_fields=["deleted"])
             return Response({"message": "Field type deleted successfully.", "status": 200})
+        except VersionConflict as e:
+            return conflict_response(e)
         except FieldType.DoesNotExist:
             return Response({"error": "Field type not found", "status": 404})
         except Exception as e:
@@ -795,7 +1211,7 @@ class CreateCountryCodeView(APIView):
 class UpdateCountryCodeView(APIView):
     def put(self, request, pk):
         try:
-            country_code = PhoneCountryCode.objects.get(id=pk, deleted=False)
+            country_code = PhoneCountryCode.objects.get(id=pk)
             data = request.data
             
             # Validate payload
@@ -814,12 +1230,14 @@ class UpdateCountryCodeView(APIView):
                 if hasattr(country_code, field):
                     setattr(country_code, field, value)
             
-            country_code.save()
-            return Response({
+            save_versioned(country_code, if_match_version(request))
+            return versioned(Response({
                 "message": "Country code updated successfully.",
                 "status": 200
-            })
+            }), country_code)
             
+        except VersionConflict as e:
+            return conflict_response(e)
         except PhoneCountryCode.DoesNotExist:
             return Response({"error": "Country code not found", "status": 404})
         except Exception as e:
@@ -828,25 +1246,26 @@ class UpdateCountryCodeView(APIView):
 class GetCountryCodeView(APIView):
     def get(self, request, pk):
         try:
-            country_code = PhoneCountryCode.objects.get(id=pk, deleted=False)
+            country_code = PhoneCountryCode.objects.get(id=pk)
             serializer = PhoneCountryCodeCreateSerializer(country_code)
-            return Response({"data": serializer.data, "status": 200})
+            return versioned(Response({"data": serializer.data, "status": 200}), country_code)
         except PhoneCountryCode.DoesNotExist:
             return Response({"error": "Country code not found", "status": 404})
 
 class ListCountryCodesView(APIView):
     def get(self, request):
-        country_codes = PhoneCountryCode.objects.filter(deleted=False)
-        serializer = PhoneCountryCodeCreateSerializer(country_codes, many=True)
-        return Response({"data": serializer.data, "status": 200})
+        country_codes = PhoneCountryCode.objects.all()
+        return lookup_list_response(request, "country_codes", country_codes, PhoneCountryCodeCreateSerializer)
 
 class DeleteCountryCodeView(APIView):
     def delete(self, request, pk):
         try:
-            country_code = PhoneCountryCode.objects.get(id=pk, deleted=False)
+            country_code = PhoneCountryCode.objects.get(id=pk)
             country_code.deleted = True
-            country_code.save()
+            save_versioned(country_code, if_match_version(request), update_fields=["deleted"])
             return Response({"message": "Country code deleted successfully.", "status": 200})
+        except VersionConflict as e:
+            return conflict_response(e)
         except PhoneCountryCode.DoesNotExist:
             return Response({"error": "Country code not found", "status": 404})
         except Exception as e:
@@ -854,9 +1273,37 @@ class DeleteCountryCodeView(APIView):
 
 class PhoneCountryCodeDropdownView(APIView):
     def get(self, request):
-        codes = PhoneCountryCode.objects.filter(deleted=False)
-        serializer = PhoneCountryCodeDropdownSerializer(codes, many=True)
-        return Response({"data":serializer.data,"status":200})
+        codes = PhoneCountryCode.objects.all()
+        return lookup_list_response(request, "phone_country_code_dropdown", codes, PhoneCountryCodeDropdownSerializer, paged=False)
+
+class BulkLookupView(APIView):
+    """
+    Batch create (POST {"items": [...]}), update (PATCH {"items": [{"id": ..., ...}]})
+    and soft-delete (DELETE {"ids": [...]}) for one lookup table. A batch with
+    any invalid item is rejected as a whole, with errors keyed by item index.
+    """
+    lookup = None
+
+    def post(self, request):
+        try:
+            data = bulk_create_lookups(self.lookup, request.data)
+        except BulkError as e:
+            return Response({"status": 400, "errors": e.errors}, status=400)
+        return Response({"created": len(data), "data": data, "status": 201}, status=201)
+
+    def patch(self, request):
+        try:
+            data = bulk_update_lookups(self.lookup, request.data)
+        except BulkError as e:
+            return Response({"status": 400, "errors": e.errors}, status=400)
+        return Response({"updated": len(data), "data": data, "status": 200}, status=200)
+
+    def delete(self, request):
+        try:
+            result = bulk_delete_lookups(self.lookup, request.data)
+        except BulkError as e:
+            return Response({"status": 400, "errors": e.errors}, status=400)
+        return Response({**result, "status": 200}, status=200)
 
 # Custom Field Views
 class CreateCustomFieldView(APIView):
@@ -889,7 +1336,7 @@ class CreateCustomFieldView(APIView):
 class UpdateCustomFieldView(APIView):
     def put(self, request, pk):
         try:
-            custom_field = EmployeeCustomFieldConfig.objects.get(id=pk, deleted=False)
+            custom_field = EmployeeCustomFieldConfig.objects.get(id=pk)
             data = request.data
             
             # Validate payload
@@ -908,9 +1355,11 @@ class UpdateCustomFieldView(APIView):
                 if hasattr(custom_field, field):
                     setattr(custom_field, field, value)
             
-            custom_field.save()
-            return Response({"message": "Custom field updated successfully.", "status": 200})
+            save_versioned(custom_field, if_match_version(request))
+            return versioned(Response({"message": "Custom field updated successfully.", "status": 200}), custom_field)
             
+        except VersionConflict as e:
+            return conflict_response(e)
         except EmployeeCustomFieldConfig.DoesNotExist:
             return Response({"error": "Custom field not found", "status": 404})
         except Exception as e:
@@ -919,39 +1368,89 @@ class UpdateCustomFieldView(APIView):
 class GetCustomFieldView(APIView):
     def get(self, request, pk):
         try:
-            custom_field = EmployeeCustomFieldConfig.objects.get(id=pk, deleted=False)
+            custom_field = EmployeeCustomFieldConfig.objects.get(id=pk)
             serializer = CustomFieldConfigListSerializer(custom_field)
-            return Response({"data": serializer.data, "status": 200})
+            return versioned(Response({"data": serializer.data, "status": 200}), custom_field)
         except EmployeeCustomFieldConfig.DoesNotExist:
             return Response({"error": "Custom field not found", "status": 404})
 
 class ListCustomFieldsView(APIView):
     def get(self, request):
-        custom_fields = EmployeeCustomFieldConfig.objects.filter(deleted=False)
+        custom_fields = EmployeeCustomFieldConfig.objects.all()
+        validators = CacheValidators(request, collection_stamp(custom_fields, related=("field_type",)))
+        if validators.not_modified is not None:
+            return validators.not_modified
+        try:
+            custom_fields, next_cursor = paginate_keyset(custom_fields, request, default_limit=None)
+        except InvalidCursor as e:
+            return Response({"error": str(e), "status": 400}, status=400)
         serializer = CustomFieldConfigListSerializer(custom_fields, many=True)
-        return Response({"data": serializer.data, "status": 200})
+        return validators.apply(Response({"data": serializer.data, "next": next_cursor, "status": 200}, status=200))
 
 class DeleteCustomFieldView(APIView):
     def delete(self, request, pk):
         try:
-            custom_field = EmployeeCustomFieldConfig.objects.get(id=pk, deleted=False)
+            custom_field = EmployeeCustomFieldConfig.objects.get(id=pk)
             custom_field.deleted = True
-            custom_field.save()
+            save_versioned(custom_field, if_match_version(request), update_fields=["deleted"])
             return Response({"message": "Custom field deleted successfully.", "status": 200})
+        except VersionConflict as e:
+            return conflict_response(e)
         except EmployeeCustomFieldConfig.DoesNotExist:
             return Response({"error": "Custom field not found", "status": 404})
         except Exception as e:
             return Response({"error": str(e), "status": 500})
 
+FORM_BOOTSTRAP_LOOKUPS = [
+    ("contract_types", lambda: ContractType.objects.all(), ContractTypeSerializer, ()),
+    ("job_titles", lambda: JobTitle.objects.all(), JobTitleSerializer, ()),
+    ("departments", lambda: Department.objects.all(), DepartmentSerializer, ()),
+    ("locations", lambda: Locations.objects.all(), LocationsSerializer, ()),
+    ("banks", lambda: Bank.objects.all(), BankSerializer, ()),
+    ("phone_country_code_dropdown", lambda: PhoneCountryCode.objects.all(), PhoneCountryCodeDropdownSerializer, ()),
+    ("designations", lambda: Designation.objects.all(), DesignationSerializer, ()),
+    ("selected_custom_fields", lambda: EmployeeCustomFieldConfig.objects.filter(is_selected=True), CustomFieldConfigListSerializer, ("field_type",)),
+]
+
+def build_form_bootstrap():
+    data = {
+        name: lookup_list(name, queryset(), serializer_class, related)["data"]
+        for name, queryset, serializer_class, related in FORM_BOOTSTRAP_LOOKUPS
+    }
+    content = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True, separators=(",", ":"))
+    return {"data": data, "hash": hashlib.sha1(content.encode()).hexdigest()}
+
+class FormBootstrapView(APIView):
+    """
+    Everything the employee form needs in its dropdowns, in one response.
+
+    `hash` covers the whole payload and doubles as the ETag, so a client
+    holding the current copy gets a 304 for one cache lookup.
+    """
+    def get(self, request):
+        models = [ContractType, JobTitle, Department, Locations, Bank, PhoneCountryCode, Designation, EmployeeCustomFieldConfig, FieldType]
+        bootstrap = cached_lookup("form_bootstrap", models, build_form_bootstrap)
+
+        etag = quote_etag(bootstrap["hash"])
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            return not_modified
+
+        response = Response({**bootstrap["data"], "hash": bootstrap["hash"], "status": 200}, status=200)
+        response["ETag"] = etag
+        return response
+
 class GetSelectedCustomFieldsView(APIView):
     def get(self, request):
         """Get only selected custom fields for employee creation"""
         selected_fields = EmployeeCustomFieldConfig.objects.filter(
-            is_selected=True, 
-            deleted=False
+            is_selected=True
+        )
+        return lookup_list_response(
+            request, "selected_custom_fields", selected_fields, CustomFieldConfigListSerializer,
+            related=("field_type",), paged=False
         )
-        serializer = CustomFieldConfigListSerializer(selected_fields, many=True)
-        return Response({"data": serializer.data, "status": 200})
 
 class CreateEmployeeCustomFieldConfig(APIView):
     def post(self, request):
@@ -992,11 +1491,11 @@ class VisaExpiryAlertView(APIView):
         
         employees = Employee.objects.filter(
             visa_expiry__isnull=False,
-            visa_expiry__range=(today, cutoff_date),
-            deleted=False
+            visa_expiry__range=(today, cutoff_date)
         ).order_by('visa_expiry')
+        employees = EmployeeReadSerializer.setup_eager_loading(employees)
 
-        serialized_data = EmployeeSerializer(employees, many=True).data
+        serialized_data = EmployeeReadSerializer(employees, many=True).data
         return Response({
             "count": len(serialized_data),
             "employees_with_expiring_visa": serialized_data,
@@ -1014,36 +1513,87 @@ class UploadAttachmentView(APIView):
             if not files or not employee_id:
                 return Response({"detail": "file(s) and employee_id are required."}, status=400)
 
-            saved_attachments = []
-
-            with transaction.atomic():
-                for file_input in files:
-                    file_prefix = str(uuid.uuid4())
-                    azure_url = upload_file_to_azure(file_input, folder_name="attachments", prefix=file_prefix)
-
-                    if not azure_url:
-                        return Response({"detail": f"File upload failed for {file_input.name}."}, status=500)
-
-                    attachment = Attachment.objects.create(
-                        document=azure_url,
-                        employee_id=employee_id,
-                        original_filename=file_input.name
-                    )
-
-                    saved_attachments.append({
-                        "original_filename": file_input.name,
-                        "employee_id": int(employee_id),
-                        "document_url": azure_url,
-                        "created_at": now()
-                        # "created_by_id": request.user.id if needed
-                    })
-
+            urls = upload_attachments(files)
+            try:
+                with transaction.atomic():
+                    Attachment.objects.bulk_create([
+                        Attachment(document=url, employee_id=employee_id, original_filename=file_input.name)
+                        for file_input, url in zip(files, urls)
+                    ])
+            except Exception:
+                discard_attachments(urls)
+                raise
+
+            saved_attachments = [
+                {
+                    "original_filename": file_input.name,
+                    "employee_id": int(employee_id),
+                    "document_url": url,
+                    "created_at": now()
+                    # "created_by_id": request.user.id if needed
+                }
+                for file_input, url in zip(files, urls)
+            ]
             return Response({"attachments": saved_attachments}, status=201)
 
         except Exception as e:
             return Response({"detail": str(e)}, status=500)
 
            
+class StartUploadView(APIView):
+    """Chunked upload, step 1: announce the file and get its upload_id"""
+    def post(self, request):
+        if not get_attachment_storage().supports_streaming:
+            return Response({
+                "status": 501,
+                "error": "Chunked uploads are not supported by the configured storage backend."
+            }, status=501)
+
+        validation_result = validate_upload_session_payload(request.data)
+        if not validation_result["is_valid"]:
+            return Response({"status": 400, "errors": validation_result["errors"]}, status=400)
+
+        cleaned_data = validation_result["cleaned_data"]
+        session = UploadSession.objects.create(
+            **cleaned_data,
+            total_chunks=chunk_count(cleaned_data["total_size"], cleaned_data["chunk_size"])
+        )
+        schedule_upload_expiry(session)
+        return Response({**upload_progress(session), "status": 201}, status=201)
+
+
+class UploadChunkView(APIView):
+    """Chunked upload, step 2: PUT each part as the raw request body"""
+    def put(self, request, upload_id, index):
+        session = get_object_or_404(UploadSession, pk=upload_id)
+        try:
+            store_chunk(session, index, request.body)
+        except UploadStateError as e:
+            return Response({"status": 400, "error": str(e)}, status=400)
+        return Response({**upload_progress(session), "status": 200}, status=200)
+
+
+class UploadStatusView(APIView):
+    """Which parts have arrived, so an interrupted client knows where to resume"""
+    def get(self, request, upload_id):
+        session = get_object_or_404(UploadSession, pk=upload_id)
+        return Response({**upload_progress(session), "status": 200}, status=200)
+
+
+class CompleteUploadView(APIView):
+    """Chunked upload, step 3: assemble the parts and create the attachment"""
+    def post(self, request, upload_id):
+        session = get_object_or_404(UploadSession, pk=upload_id)
+        try:
+            attachment = complete_upload(session)
+        except UploadStateError as e:
+            return Response({"status": 400, "error": str(e), **upload_progress(session)}, status=400)
+        return Response({
+            "status": 201,
+            "attachment": AttachmentSerializer(attachment).data
+        }, status=201)
+
+
 class GetAttachmentView(APIView):
     def get(self, request, pk):
         attachment = get_object_or_404(Attachment, pk=pk)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,6 +48,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'employee.history.CurrentUserMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -82,6 +84,17 @@ DATABASES = {
 }
 
 
+# Lookup lists and headcount stats are cached here. Point this at a shared
+# backend (Redis, Memcached) when running more than one process so every
+# process sees the same table versions; with LocMemCache cached lookups are
+# kept for at most a minute and `check --deploy` warns (employee.W001).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -101,6 +114,16 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+AUTHENTICATION_BACKENDS = [
+    'django.contrib.auth.backends.ModelBackend',
+    'employee.accounts.EmployeeFirstLoginBackend',
+]
+
+# Employee logins start with an unusable password; the phone number is hashed
+# on first login or by `manage.py provision_employee_passwords`
+EMPLOYEE_DEFER_PASSWORD_HASHING = True
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -118,6 +141,18 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Employee attachment backend (employee/storage.py):
+#   "azure_upload" - the deployment's payroll/azure_upload.py helper
+#   "azure"        - azure-storage-blob SDK with a pooled client, see AZURE_STORAGE_*
+#   "local"        - files under ATTACHMENT_LOCAL_ROOT, for development and offline tests
+#   "memory"       - an in-process dict, for tests and load testing
+ATTACHMENT_STORAGE = os.environ.get('ATTACHMENT_STORAGE', 'azure_upload')
+ATTACHMENT_LOCAL_ROOT = BASE_DIR / 'media'
+ATTACHMENT_LOCAL_URL = '/media/'
+ATTACHMENT_UPLOAD_WORKERS = 8
+AZURE_STORAGE_CONNECTION_STRING = os.environ.get('AZURE_STORAGE_CONNECTION_STRING')
+AZURE_STORAGE_CONTAINER = os.environ.get('AZURE_STORAGE_CONTAINER', 'attachments')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
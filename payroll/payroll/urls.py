@@ -14,6 +14,8 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path,include
 
@@ -21,3 +23,6 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('employee/',include('employee.urls')),
 ]
+
+if settings.ATTACHMENT_STORAGE == 'local':
+    urlpatterns += static(settings.ATTACHMENT_LOCAL_URL, document_root=settings.ATTACHMENT_LOCAL_ROOT)